@@ -162,23 +162,27 @@ def help(module=None, *args):
             'Or call "ansible.list" to know what is available.'
         )
 
-    ansible_doc_bin = salt.utils.path.which("ansible-doc")
-
-    env = os.environ.copy()
-    env["ANSIBLE_DEPRECATION_WARNINGS"] = "0"
-
-    proc = subprocess.run(
-        [ansible_doc_bin, "--json", "--type=module", module],
-        capture_output=True,
-        check=True,
-        shell=False,
-        text=True,
-        env=env,
-    )
-    data = salt.utils.json.loads(proc.stdout)
-    doc = data[next(iter(data))]
+    # ansible-doc is slow to start, keep the parsed documentation around
+    cache = __context__.setdefault("ansible.help", {})
+    doc = cache.get(module)
+    if doc is None:
+        ansible_doc_bin = salt.utils.path.which("ansible-doc")
+
+        env = os.environ.copy()
+        env["ANSIBLE_DEPRECATION_WARNINGS"] = "0"
+
+        proc = subprocess.run(
+            [ansible_doc_bin, "--json", "--type=module", module],
+            capture_output=True,
+            check=True,
+            shell=False,
+            text=True,
+            env=env,
+        )
+        data = salt.utils.json.loads(proc.stdout)
+        doc = cache[module] = data[next(iter(data))]
     if not args:
-        ret = doc["doc"]
+        ret = dict(doc["doc"])
         for section in ("examples", "return", "metadata"):
             section_data = doc.get(section)
             if section_data:
@@ -24,15 +24,119 @@ rest API.
 
 """
 
+import functools
+import inspect
 import logging
 
-import salt.proxy.cimc
+import salt.exceptions
 import salt.utils.platform
 
 log = logging.getLogger(__name__)
 
 __virtualname__ = "cimc"
 
+# XML payloads sent to the device by the setter functions.
+_TMPL_ACTIVATE_BACKUP_IMAGE = (
+    "<firmwareBootUnit dn='sys/rack-unit-1/mgmt/fw-boot-def/bootunit-combined'"
+    " adminState='trigger' image='backup' resetOnActivate='{reset}'/>"
+)
+_TMPL_CREATE_USER = (
+    '<aaaUser id="{uid}" accountStatus="active" name="{username}" priv="{priv}"'
+    ' pwd="{password}" dn="sys/user-ext/user-{uid}"/>'
+)
+_TMPL_MOUNT_SHARE = (
+    "<commVMediaMap dn='sys/svc-ext/vmedia-svc/vmmap-{name}' map='{mtype}'{opts}"
+    " remoteFile='{file}' remoteShare='{share}' status='created'"
+    " volumeName='Win12'/>"
+)
+_TMPL_MOUNT_OPTIONS = " mountOptions='username={username},password={password}'"
+_TMPL_REBOOT = '<computeRackUnit adminPower="cycle-immediate" dn="sys/rack-unit-1"/>'
+_TMPL_SET_HOSTNAME = '<mgmtIf dn="sys/rack-unit-1/mgmt/if-1" hostname="{hostname}"/>'
+_TMPL_SET_LOGGING_LEVELS = '<commSyslog dn="sys/svc-ext/syslog"{query}/>'
+_TMPL_SET_NTP_SERVER = (
+    '<commNtpProvider dn="sys/svc-ext/ntp-svc" ntpEnable="yes"'
+    ' ntpServer1="{server1}" ntpServer2="{server2}" ntpServer3="{server3}"'
+    ' ntpServer4="{server4}"/>'
+)
+_TMPL_SET_POWER_CONFIGURATION = (
+    '<biosVfResumeOnACPowerLoss dn="sys/rack-unit-1/board/Resume-on-AC-power-loss"'
+    "{query}/>"
+)
+_TMPL_SET_SYSLOG_SERVER = (
+    "<commSyslogClient name='{type}' adminState='enabled' hostname='{server}'"
+    " dn='sys/svc-ext/syslog/client-{type}'/>"
+)
+_TMPL_SET_USER = '<aaaUser id="{uid}"{conf} dn="sys/user-ext/user-{uid}"/>'
+_TMPL_TFTP_UPDATE = (
+    "<firmwareUpdatable adminState='trigger' dn='{dn}' protocol='tftp'"
+    " remoteServer='{server}' remotePath='{path}' type='{type}'/>"
+)
+
+# The classes queried by the get_* functions, retrieved together by get_all.
+# They are split by the hierarchical flag the getters use, so that get_all
+# fills the proxy cache entries the getters look up.
+_DEFAULT_CLASSES = (
+    "aaaLdap",
+    "adaptorExtEthIf",
+    "adaptorGenProfile",
+    "adaptorHostEthIf",
+    "adaptorHostFcIf",
+    "biosPlatformDefaults",
+    "biosSettings",
+    "biosVfResumeOnACPowerLoss",
+    "lsbootDef",
+    "mgmtIf",
+    "networkAdapterEthIf",
+    "pidCatalogCpu",
+    "pidCatalogDimm",
+    "pidCatalogHdd",
+    "pidCatalogPCIAdapter",
+)
+_DEFAULT_FLAT_CLASSES = (
+    "aaaUser",
+    "biosVfSelectMemoryRASConfiguration",
+    "commNtpProvider",
+    "commSnmp",
+    "commSyslog",
+    "commSyslogClient",
+    "computeRackUnit",
+    "equipmentPsu",
+    "firmwareRunning",
+    "mgmtIf",
+)
+
+# Error messages raised by _require when an argument is missing.
+_REQUIRED_MESSAGES = {
+    "hostname": "Hostname option must be provided.",
+    "name": "The share name must be specified.",
+    "password": "The password must be specified.",
+    "path": "The TFTP path must be specified.",
+    "priv": "The privilege level must be specified.",
+    "remote_file": "The remote file name must be specified.",
+    "remote_share": "The remote share path must be specified.",
+    "server": "The server name must be specified.",
+    "uid": "The user ID must be specified.",
+    "username": "The username must be specified.",
+}
+
+# Translation table used to escape user supplied values placed in the payloads.
+_XML_ESCAPE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", "'": "&apos;", '"': "&quot;"}
+)
+
+_LOGGING_LEVELS = frozenset(
+    (
+        "emergency",
+        "alert",
+        "critical",
+        "error",
+        "warning",
+        "notice",
+        "informational",
+        "debug",
+    )
+)
+
 
 def __virtual__():
     """
@@ -47,7 +151,53 @@ def __virtual__():
     return False, "The cimc execution module can only be loaded for cimc proxy minions."
 
 
-def activate_backup_image(reset=False):
+def _require(*names, **messages):
+    """
+    Decorator raising CommandExecutionError when one of the named arguments of
+    the decorated function is missing or empty. The error message is looked up
+    in ``_REQUIRED_MESSAGES`` unless it is overridden in ``messages``.
+    """
+    checks = tuple(
+        (name, messages.get(name, _REQUIRED_MESSAGES.get(name))) for name in names
+    )
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            arguments = signature.bind_partial(*args, **kwargs).arguments
+            for name, message in checks:
+                if not arguments.get(name):
+                    raise salt.exceptions.CommandExecutionError(message)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _xml_escape(value):
+    """
+    Escape a value for use inside an XML attribute of a payload.
+    """
+    if value is None:
+        return ""
+    return str(value).translate(_XML_ESCAPE)
+
+
+def _set_config_modify(dn, inconfig, batch=None):
+    """
+    Apply a configuration change, or queue it on ``batch`` when one is given.
+    """
+    if batch is not None:
+        batch.append((dn, inconfig))
+        return batch
+
+    return __proxy__["cimc.set_config_modify"](dn, inconfig, False)
+
+
+def activate_backup_image(reset=False, batch=None):
     """
     Activates the firmware backup image.
 
@@ -56,6 +206,10 @@ def activate_backup_image(reset=False):
     Args:
         reset(bool): Reset the CIMC device on activate.
 
+        batch(list): Queue the change on this list instead of applying it
+        immediately. Queued changes are applied in one request by
+        :py:func:`cimc.batch <salt.modules.cimc.batch>`.
+
     .. code-block:: bash
 
         salt '*' cimc.activate_backup_image
@@ -70,17 +224,54 @@ def activate_backup_image(reset=False):
     if reset is True:
         r = "yes"
 
-    inconfig = """<firmwareBootUnit dn='sys/rack-unit-1/mgmt/fw-boot-def/bootunit-combined'
-    adminState='trigger' image='backup' resetOnActivate='{}' />""".format(
-        r
-    )
+    inconfig = _TMPL_ACTIVATE_BACKUP_IMAGE.format(reset=r)
 
-    ret = __proxy__["cimc.set_config_modify"](dn, inconfig, False)
+    ret = _set_config_modify(dn, inconfig, batch)
 
     return ret
 
 
-def create_user(uid=None, username=None, password=None, priv=None):
+def batch(*ops):
+    """
+    Apply several configuration changes to the device in a single request.
+
+    .. versionadded:: 3008.0
+
+    Args:
+        ops(tuple): The ``(dn, inconfig)`` pairs to apply. These are usually
+        collected by passing the same ``batch`` list to several of the setter
+        functions in this module.
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt '*' cimc.batch \\
+            '["sys/svc-ext/syslog/client-primary", "<commSyslogClient name=\\"primary\\" adminState=\\"enabled\\" hostname=\\"10.0.0.1\\"/>"]' \\
+            '["sys/svc-ext/syslog/client-secondary", "<commSyslogClient name=\\"secondary\\" adminState=\\"enabled\\" hostname=\\"10.0.0.2\\"/>"]'
+
+    From another execution module or a state module:
+
+    .. code-block:: python
+
+        changes = []
+        __salt__["cimc.set_syslog_server"]("10.0.0.1", "primary", batch=changes)
+        __salt__["cimc.set_syslog_server"]("10.0.0.2", "secondary", batch=changes)
+        __salt__["cimc.batch"](*changes)
+
+    """
+    if not ops:
+        raise salt.exceptions.CommandExecutionError(
+            "At least one configuration change must be specified."
+        )
+
+    ret = __proxy__["cimc.set_config_modify_many"](list(ops), False)
+
+    return ret
+
+
+@_require("uid", "username", "password", "priv")
+def create_user(uid=None, username=None, password=None, priv=None, batch=None):
     """
     Create a CIMC user with username and password.
 
@@ -93,6 +284,10 @@ def create_user(uid=None, username=None, password=None, priv=None):
 
         priv(str): The privilege level of the user.
 
+        batch(list): Queue the change on this list instead of applying it
+        immediately. Queued changes are applied in one request by
+        :py:func:`cimc.batch <salt.modules.cimc.batch>`.
+
     CLI Example:
 
     .. code-block:: bash
@@ -101,28 +296,55 @@ def create_user(uid=None, username=None, password=None, priv=None):
 
     """
 
-    if not uid:
-        raise salt.exceptions.CommandExecutionError("The user ID must be specified.")
+    uid = _xml_escape(uid)
+    dn = f"sys/user-ext/user-{uid}"
 
-    if not username:
-        raise salt.exceptions.CommandExecutionError("The username must be specified.")
+    inconfig = _TMPL_CREATE_USER.format(
+        uid=uid,
+        username=_xml_escape(username),
+        priv=_xml_escape(priv),
+        password=_xml_escape(password),
+    )
 
-    if not password:
-        raise salt.exceptions.CommandExecutionError("The password must be specified.")
+    ret = _set_config_modify(dn, inconfig, batch)
 
-    if not priv:
-        raise salt.exceptions.CommandExecutionError(
-            "The privilege level must be specified."
-        )
+    return ret
 
-    dn = f"sys/user-ext/user-{uid}"
 
-    inconfig = """<aaaUser id="{0}" accountStatus="active" name="{1}" priv="{2}"
-    pwd="{3}"  dn="sys/user-ext/user-{0}"/>""".format(
-        uid, username, priv, password
-    )
+def get_all(classes=None):
+    """
+    Retrieves the managed objects of several classes in a single request to
+    the device. Without ``classes``, two requests are made: one for the
+    classes the ``get_*`` functions query hierarchically, one for the others.
 
-    ret = __proxy__["cimc.set_config_modify"](dn, inconfig, False)
+    .. versionadded:: 3008.0
+
+    Args:
+        classes(list): The class IDs to retrieve. Defaults to all classes
+        queried by the ``get_*`` functions of this module.
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt '*' cimc.get_all
+
+        salt '*' cimc.get_all classes='[mgmtIf, aaaUser]'
+
+    """
+    if isinstance(classes, str):
+        classes = classes.split(",")
+
+    if classes:
+        return __proxy__["cimc.get_config_resolver_classes"](list(classes), True)
+
+    ret = __proxy__["cimc.get_config_resolver_classes"](
+        list(_DEFAULT_FLAT_CLASSES), False
+    )
+    # The hierarchical results also hold the child objects, prefer them
+    ret.update(
+        __proxy__["cimc.get_config_resolver_classes"](list(_DEFAULT_CLASSES), True)
+    )
 
     return ret
 
@@ -539,6 +761,7 @@ def get_vic_uplinks():
     return ret
 
 
+@_require("name", "remote_share", "remote_file")
 def mount_share(
     name=None,
     remote_share=None,
@@ -546,6 +769,7 @@ def mount_share(
     mount_type="nfs",
     username=None,
     password=None,
+    batch=None,
 ):
     """
     Mounts a remote file through a remote share. Currently, this feature is supported in version 1.5 or greater.
@@ -576,6 +800,10 @@ def mount_share(
         password(str): An optional requirement to pass a password to the remote share. If not provided, an
         unauthenticated connection attempt will be made.
 
+        batch(list): Queue the change on this list instead of applying it
+        immediately. Queued changes are applied in one request by
+        :py:func:`cimc.batch <salt.modules.cimc.batch>`.
+
     CLI Example:
 
     .. code-block:: bash
@@ -586,42 +814,37 @@ def mount_share(
 
     """
 
-    if not name:
-        raise salt.exceptions.CommandExecutionError("The share name must be specified.")
-
-    if not remote_share:
-        raise salt.exceptions.CommandExecutionError(
-            "The remote share path must be specified."
-        )
-
-    if not remote_file:
-        raise salt.exceptions.CommandExecutionError(
-            "The remote file name must be specified."
-        )
-
     if username and password:
-        mount_options = " mountOptions='username={},password={}'".format(
-            username, password
+        mount_options = _TMPL_MOUNT_OPTIONS.format(
+            username=_xml_escape(username), password=_xml_escape(password)
         )
     else:
         mount_options = ""
 
+    name = _xml_escape(name)
     dn = f"sys/svc-ext/vmedia-svc/vmmap-{name}"
-    inconfig = """<commVMediaMap dn='sys/svc-ext/vmedia-svc/vmmap-{}' map='{}'{}
-    remoteFile='{}' remoteShare='{}' status='created'
-    volumeName='Win12' />""".format(
-        name, mount_type, mount_options, remote_file, remote_share
+    inconfig = _TMPL_MOUNT_SHARE.format(
+        name=name,
+        mtype=_xml_escape(mount_type),
+        opts=mount_options,
+        file=_xml_escape(remote_file),
+        share=_xml_escape(remote_share),
     )
 
-    ret = __proxy__["cimc.set_config_modify"](dn, inconfig, False)
+    ret = _set_config_modify(dn, inconfig, batch)
 
     return ret
 
 
-def reboot():
+def reboot(batch=None):
     """
     Power cycling the server.
 
+    Args:
+        batch(list): Queue the change on this list instead of applying it
+        immediately. Queued changes are applied in one request by
+        :py:func:`cimc.batch <salt.modules.cimc.batch>`.
+
     CLI Example:
 
     .. code-block:: bash
@@ -632,14 +855,15 @@ def reboot():
 
     dn = "sys/rack-unit-1"
 
-    inconfig = """<computeRackUnit adminPower="cycle-immediate" dn="sys/rack-unit-1"></computeRackUnit>"""
+    inconfig = _TMPL_REBOOT
 
-    ret = __proxy__["cimc.set_config_modify"](dn, inconfig, False)
+    ret = _set_config_modify(dn, inconfig, batch)
 
     return ret
 
 
-def set_hostname(hostname=None):
+@_require("hostname")
+def set_hostname(hostname=None, batch=None):
     """
     Sets the hostname on the server.
 
@@ -648,6 +872,10 @@ def set_hostname(hostname=None):
     Args:
         hostname(str): The new hostname to set.
 
+        batch(list): Queue the change on this list instead of applying it
+        immediately. Queued changes are applied in one request by
+        :py:func:`cimc.batch <salt.modules.cimc.batch>`.
+
     CLI Example:
 
     .. code-block:: bash
@@ -655,17 +883,14 @@ def set_hostname(hostname=None):
         salt '*' cimc.set_hostname foobar
 
     """
-    if not hostname:
-        raise salt.exceptions.CommandExecutionError("Hostname option must be provided.")
 
     dn = "sys/rack-unit-1/mgmt/if-1"
-    inconfig = (
-        """<mgmtIf dn="sys/rack-unit-1/mgmt/if-1" hostname="{}" ></mgmtIf>""".format(
-            hostname
-        )
-    )
+    inconfig = _TMPL_SET_HOSTNAME.format(hostname=_xml_escape(hostname))
+
+    ret = _set_config_modify(dn, inconfig, batch)
 
-    ret = __proxy__["cimc.set_config_modify"](dn, inconfig, False)
+    if batch is not None:
+        return ret
 
     try:
         if ret["outConfig"]["mgmtIf"][0]["status"] == "modified":
@@ -676,7 +901,7 @@ def set_hostname(hostname=None):
         return False
 
 
-def set_logging_levels(remote=None, local=None):
+def set_logging_levels(remote=None, local=None, batch=None):
     """
     Sets the logging levels of the CIMC devices. The logging levels must match
     the following options: emergency, alert, critical, error, warning, notice,
@@ -689,6 +914,10 @@ def set_logging_levels(remote=None, local=None):
 
         local(str): The logging level for the local device.
 
+        batch(list): Queue the change on this list instead of applying it
+        immediately. Queued changes are applied in one request by
+        :py:func:`cimc.batch <salt.modules.cimc.batch>`.
+
     CLI Example:
 
     .. code-block:: bash
@@ -697,21 +926,10 @@ def set_logging_levels(remote=None, local=None):
 
     """
 
-    logging_options = [
-        "emergency",
-        "alert",
-        "critical",
-        "error",
-        "warning",
-        "notice",
-        "informational",
-        "debug",
-    ]
-
     query = ""
 
     if remote:
-        if remote in logging_options:
+        if remote in _LOGGING_LEVELS:
             query += f' remoteSeverity="{remote}"'
         else:
             raise salt.exceptions.CommandExecutionError(
@@ -719,7 +937,7 @@ def set_logging_levels(remote=None, local=None):
             )
 
     if local:
-        if local in logging_options:
+        if local in _LOGGING_LEVELS:
             query += f' localSeverity="{local}"'
         else:
             raise salt.exceptions.CommandExecutionError(
@@ -727,14 +945,14 @@ def set_logging_levels(remote=None, local=None):
             )
 
     dn = "sys/svc-ext/syslog"
-    inconfig = f"""<commSyslog dn="sys/svc-ext/syslog"{query} ></commSyslog>"""
+    inconfig = _TMPL_SET_LOGGING_LEVELS.format(query=query)
 
-    ret = __proxy__["cimc.set_config_modify"](dn, inconfig, False)
+    ret = _set_config_modify(dn, inconfig, batch)
 
     return ret
 
 
-def set_ntp_server(server1="", server2="", server3="", server4=""):
+def set_ntp_server(server1="", server2="", server3="", server4="", batch=None):
     """
     Sets the NTP servers configuration. This will also enable the client NTP service.
 
@@ -747,6 +965,10 @@ def set_ntp_server(server1="", server2="", server3="", server4=""):
 
         server4(str): The fourth IP address or FQDN of the NTP servers.
 
+        batch(list): Queue the change on this list instead of applying it
+        immediately. Queued changes are applied in one request by
+        :py:func:`cimc.batch <salt.modules.cimc.batch>`.
+
     CLI Example:
 
     .. code-block:: bash
@@ -758,17 +980,19 @@ def set_ntp_server(server1="", server2="", server3="", server4=""):
     """
 
     dn = "sys/svc-ext/ntp-svc"
-    inconfig = """<commNtpProvider dn="sys/svc-ext/ntp-svc" ntpEnable="yes" ntpServer1="{}" ntpServer2="{}"
-    ntpServer3="{}" ntpServer4="{}"/>""".format(
-        server1, server2, server3, server4
+    inconfig = _TMPL_SET_NTP_SERVER.format(
+        server1=_xml_escape(server1),
+        server2=_xml_escape(server2),
+        server3=_xml_escape(server3),
+        server4=_xml_escape(server4),
     )
 
-    ret = __proxy__["cimc.set_config_modify"](dn, inconfig, False)
+    ret = _set_config_modify(dn, inconfig, batch)
 
     return ret
 
 
-def set_power_configuration(policy=None, delayType=None, delayValue=None):
+def set_power_configuration(policy=None, delayType=None, delayValue=None, batch=None):
     """
     Sets the power configuration on the device. This is only available for some
     C-Series servers.
@@ -800,6 +1024,10 @@ def set_power_configuration(policy=None, delayType=None, delayValue=None):
         the specified number of seconds before restarting the server. Enter an
         integer between 0 and 240.
 
+        batch(list): Queue the change on this list instead of applying it
+        immediately. Queued changes are applied in one request by
+        :py:func:`cimc.batch <salt.modules.cimc.batch>`.
+
     CLI Example:
 
     .. code-block:: bash
@@ -817,7 +1045,7 @@ def set_power_configuration(policy=None, delayType=None, delayValue=None):
             if delayType == "fixed":
                 query += ' delayType="fixed"'
                 if delayValue:
-                    query += f' delay="{delayValue}"'
+                    query += f' delay="{_xml_escape(delayValue)}"'
             elif delayType == "random":
                 query += ' delayType="random"'
             else:
@@ -834,18 +1062,15 @@ def set_power_configuration(policy=None, delayType=None, delayValue=None):
         )
 
     dn = "sys/rack-unit-1/board/Resume-on-AC-power-loss"
-    inconfig = """<biosVfResumeOnACPowerLoss
-    dn="sys/rack-unit-1/board/Resume-on-AC-power-loss"{}>
-    </biosVfResumeOnACPowerLoss>""".format(
-        query
-    )
+    inconfig = _TMPL_SET_POWER_CONFIGURATION.format(query=query)
 
-    ret = __proxy__["cimc.set_config_modify"](dn, inconfig, False)
+    ret = _set_config_modify(dn, inconfig, batch)
 
     return ret
 
 
-def set_syslog_server(server=None, type="primary"):
+@_require("server", server="The SYSLOG server must be specified.")
+def set_syslog_server(server=None, type="primary", batch=None):
     """
     Set the SYSLOG server on the host.
 
@@ -854,6 +1079,10 @@ def set_syslog_server(server=None, type="primary"):
 
         type(str): Specifies the type of SYSLOG server. This can either be primary (default) or secondary.
 
+        batch(list): Queue the change on this list instead of applying it
+        immediately. Queued changes are applied in one request by
+        :py:func:`cimc.batch <salt.modules.cimc.batch>`.
+
     CLI Example:
 
     .. code-block:: bash
@@ -866,34 +1095,23 @@ def set_syslog_server(server=None, type="primary"):
 
     """
 
-    if not server:
-        raise salt.exceptions.CommandExecutionError(
-            "The SYSLOG server must be specified."
-        )
-
-    if type == "primary":
-        dn = "sys/svc-ext/syslog/client-primary"
-        inconfig = """<commSyslogClient name='primary' adminState='enabled'  hostname='{}'
-        dn='sys/svc-ext/syslog/client-primary'> </commSyslogClient>""".format(
-            server
-        )
-    elif type == "secondary":
-        dn = "sys/svc-ext/syslog/client-secondary"
-        inconfig = """<commSyslogClient name='secondary' adminState='enabled'  hostname='{}'
-        dn='sys/svc-ext/syslog/client-secondary'> </commSyslogClient>""".format(
-            server
-        )
-    else:
+    if type not in ("primary", "secondary"):
         raise salt.exceptions.CommandExecutionError(
             "The SYSLOG type must be either primary or secondary."
         )
 
-    ret = __proxy__["cimc.set_config_modify"](dn, inconfig, False)
+    dn = f"sys/svc-ext/syslog/client-{type}"
+    inconfig = _TMPL_SET_SYSLOG_SERVER.format(type=type, server=_xml_escape(server))
+
+    ret = _set_config_modify(dn, inconfig, batch)
 
     return ret
 
 
-def set_user(uid=None, username=None, password=None, priv=None, status=None):
+@_require("uid")
+def set_user(
+    uid=None, username=None, password=None, priv=None, status=None, batch=None
+):
     """
     Sets a CIMC user with specified configurations.
 
@@ -910,6 +1128,10 @@ def set_user(uid=None, username=None, password=None, priv=None, status=None):
 
         status(str): The account status of the user.
 
+        batch(list): Queue the change on this list instead of applying it
+        immediately. Queued changes are applied in one request by
+        :py:func:`cimc.batch <salt.modules.cimc.batch>`.
+
     CLI Example:
 
     .. code-block:: bash
@@ -919,31 +1141,31 @@ def set_user(uid=None, username=None, password=None, priv=None, status=None):
     """
 
     conf = ""
-    if not uid:
-        raise salt.exceptions.CommandExecutionError("The user ID must be specified.")
 
     if status:
-        conf += f' accountStatus="{status}"'
+        conf += f' accountStatus="{_xml_escape(status)}"'
 
     if username:
-        conf += f' name="{username}"'
+        conf += f' name="{_xml_escape(username)}"'
 
     if priv:
-        conf += f' priv="{priv}"'
+        conf += f' priv="{_xml_escape(priv)}"'
 
     if password:
-        conf += f' pwd="{password}"'
+        conf += f' pwd="{_xml_escape(password)}"'
 
+    uid = _xml_escape(uid)
     dn = f"sys/user-ext/user-{uid}"
 
-    inconfig = """<aaaUser id="{0}"{1} dn="sys/user-ext/user-{0}"/>""".format(uid, conf)
+    inconfig = _TMPL_SET_USER.format(uid=uid, conf=conf)
 
-    ret = __proxy__["cimc.set_config_modify"](dn, inconfig, False)
+    ret = _set_config_modify(dn, inconfig, batch)
 
     return ret
 
 
-def tftp_update_bios(server=None, path=None):
+@_require("server", "path")
+def tftp_update_bios(server=None, path=None, batch=None):
     """
     Update the BIOS firmware through TFTP.
 
@@ -952,6 +1174,10 @@ def tftp_update_bios(server=None, path=None):
 
         path(str): The TFTP path and filename for the BIOS image.
 
+        batch(list): Queue the change on this list instead of applying it
+        immediately. Queued changes are applied in one request by
+        :py:func:`cimc.batch <salt.modules.cimc.batch>`.
+
     CLI Example:
 
     .. code-block:: bash
@@ -960,28 +1186,19 @@ def tftp_update_bios(server=None, path=None):
 
     """
 
-    if not server:
-        raise salt.exceptions.CommandExecutionError(
-            "The server name must be specified."
-        )
-
-    if not path:
-        raise salt.exceptions.CommandExecutionError("The TFTP path must be specified.")
-
     dn = "sys/rack-unit-1/bios/fw-updatable"
 
-    inconfig = """<firmwareUpdatable adminState='trigger' dn='sys/rack-unit-1/bios/fw-updatable'
-    protocol='tftp' remoteServer='{}' remotePath='{}'
-    type='blade-bios' />""".format(
-        server, path
+    inconfig = _TMPL_TFTP_UPDATE.format(
+        dn=dn, server=_xml_escape(server), path=_xml_escape(path), type="blade-bios"
     )
 
-    ret = __proxy__["cimc.set_config_modify"](dn, inconfig, False)
+    ret = _set_config_modify(dn, inconfig, batch)
 
     return ret
 
 
-def tftp_update_cimc(server=None, path=None):
+@_require("server", "path")
+def tftp_update_cimc(server=None, path=None, batch=None):
     """
     Update the CIMC firmware through TFTP.
 
@@ -990,6 +1207,10 @@ def tftp_update_cimc(server=None, path=None):
 
         path(str): The TFTP path and filename for the CIMC image.
 
+        batch(list): Queue the change on this list instead of applying it
+        immediately. Queued changes are applied in one request by
+        :py:func:`cimc.batch <salt.modules.cimc.batch>`.
+
     CLI Example:
 
     .. code-block:: bash
@@ -998,22 +1219,15 @@ def tftp_update_cimc(server=None, path=None):
 
     """
 
-    if not server:
-        raise salt.exceptions.CommandExecutionError(
-            "The server name must be specified."
-        )
-
-    if not path:
-        raise salt.exceptions.CommandExecutionError("The TFTP path must be specified.")
-
     dn = "sys/rack-unit-1/mgmt/fw-updatable"
 
-    inconfig = """<firmwareUpdatable adminState='trigger' dn='sys/rack-unit-1/mgmt/fw-updatable'
-    protocol='tftp' remoteServer='{}' remotePath='{}'
-    type='blade-controller' />""".format(
-        server, path
+    inconfig = _TMPL_TFTP_UPDATE.format(
+        dn=dn,
+        server=_xml_escape(server),
+        path=_xml_escape(path),
+        type="blade-controller",
     )
 
-    ret = __proxy__["cimc.set_config_modify"](dn, inconfig, False)
+    ret = _set_config_modify(dn, inconfig, batch)
 
     return ret
@@ -16,7 +16,6 @@ Module for sending messages to Mattermost
 
 import logging
 
-import salt.utils.json
 import salt.utils.mattermost
 from salt.exceptions import SaltInvocationError
 
@@ -34,15 +33,31 @@ def __virtual__():
     return __virtualname__
 
 
+def _get_config(name):
+    """
+    Retrieves a Mattermost configuration value, caching it in ``__context__``.
+    The cache goes away with ``__context__`` when the modules are refreshed,
+    e.g. on a pillar refresh.
+
+    :param name:        The configuration key below ``mattermost``.
+    :return:            The configured value or None.
+    """
+    cache = __context__.setdefault("mattermost.config", {})
+    if name not in cache:
+        value = __salt__["config.get"](f"mattermost.{name}")
+        if not value:
+            value = __salt__["config.get"](f"mattermost:{name}")
+        cache[name] = value
+    return cache[name]
+
+
 def _get_hook():
     """
     Retrieves and return the Mattermost's configured hook
 
     :return:            String: the hook string
     """
-    hook = __salt__["config.get"]("mattermost.hook") or __salt__["config.get"](
-        "mattermost:hook"
-    )
+    hook = _get_config("hook")
     if not hook:
         raise SaltInvocationError("No Mattermost Hook found")
 
@@ -55,9 +70,7 @@ def _get_api_url():
 
     :return:            String: the api url string
     """
-    api_url = __salt__["config.get"]("mattermost.api_url") or __salt__["config.get"](
-        "mattermost:api_url"
-    )
+    api_url = _get_config("api_url")
     if not api_url:
         raise SaltInvocationError("No Mattermost API URL found")
 
@@ -70,9 +83,7 @@ def _get_channel():
 
     :return:            String: the channel string
     """
-    channel = __salt__["config.get"]("mattermost.channel") or __salt__["config.get"](
-        "mattermost:channel"
-    )
+    channel = _get_config("channel")
 
     return channel
 
@@ -83,13 +94,32 @@ def _get_username():
 
     :return:            String: the username string
     """
-    username = __salt__["config.get"]("mattermost.username") or __salt__["config.get"](
-        "mattermost:username"
-    )
+    username = _get_config("username")
 
     return username
 
 
+def _get_parameters():
+    """
+    Retrieves the default message parameters, built once from the configured
+    channel and username and cached in ``__context__``. Callers must copy the
+    returned dict before changing it.
+
+    :return:            Dict: the default message parameters
+    """
+    if "mattermost.parameters" not in __context__:
+        parameters = {}
+        channel = _get_channel()
+        if channel:
+            parameters["channel"] = channel
+        username = _get_username()
+        if username:
+            parameters["username"] = username
+        __context__["mattermost.parameters"] = parameters
+
+    return __context__["mattermost.parameters"]
+
+
 def post_message(message, channel=None, username=None, api_url=None, hook=None):
     """
     Send a message to a Mattermost channel.
@@ -113,25 +143,61 @@ def post_message(message, channel=None, username=None, api_url=None, hook=None):
     if not hook:
         hook = _get_hook()
 
-    if not username:
-        username = _get_username()
-
-    if not channel:
-        channel = _get_channel()
-
     if not message:
         log.error("message is a required option.")
 
-    parameters = dict()
+    parameters = _get_parameters().copy()
     if channel:
         parameters["channel"] = channel
     if username:
         parameters["username"] = username
-    parameters["text"] = "```" + message + "```"  # pre-formatted, fixed-width text
+    parameters["text"] = f"```{message}```"  # pre-formatted, fixed-width text
     log.debug("Parameters: %s", parameters)
-    data = "payload={}".format(
-        salt.utils.json.dumps(parameters)
-    )  # pylint: disable=blacklisted-function
-    result = salt.utils.mattermost.query(api_url=api_url, hook=hook, data=data)
+    result = salt.utils.mattermost.query(
+        api_url=api_url, hook=hook, json=parameters, opts=__opts__
+    )
 
     return bool(result)
+
+
+def post_messages(messages, channel=None, username=None, api_url=None, hook=None):
+    """
+    Send several messages to a Mattermost channel in as few posts as the
+    post size limit allows.
+
+    .. versionadded:: 3008.0
+
+    :param channel:     The channel name, either will work.
+    :param username:    The username of the poster.
+    :param messages:    The list of messages to send to the Mattermost channel.
+    :param api_url:     The Mattermost api url, if not specified in the configuration.
+    :param hook:        The Mattermost hook, if not specified in the configuration.
+    :return:            Boolean if the messages were sent successfully.
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt '*' mattermost.post_messages '["Build is done", "Tests passed"]'
+    """
+    if isinstance(messages, str):
+        messages = [messages]
+
+    if not messages:
+        log.error("messages is a required option.")
+        return False
+
+    is_ok = True
+    # Leave room for the code block markers added by post_message
+    size = salt.utils.mattermost.MAX_POST_SIZE - 6
+    for text in salt.utils.mattermost.split_messages(messages, size):
+        if not post_message(
+            text,
+            channel=channel,
+            username=username,
+            api_url=api_url,
+            hook=hook,
+        ):
+            is_ok = False
+
+    return is_ok
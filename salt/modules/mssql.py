@@ -179,11 +179,17 @@ def db_create(database, containment="NONE", new_database_options=None, **kwargs)
     return True
 
 
-def db_remove(database_name, **kwargs):
+def db_remove(database_name, if_exists=False, **kwargs):
     """
     Drops a specific database from the MS SQL server.
     It will not drop any of 'master', 'model', 'msdb' or 'tempdb'.
 
+    if_exists
+        Return None instead of False when the database does not exist, so
+        callers do not need to check for it beforehand.
+
+        .. versionadded:: 3008.0
+
     CLI Example:
 
     .. code-block:: bash
@@ -191,7 +197,10 @@ def db_remove(database_name, **kwargs):
         salt minion mssql.db_remove database_name='DBNAME'
     """
     try:
-        if db_exists(database_name, **kwargs) and database_name not in [
+        exists = db_exists(database_name, **kwargs)
+        if not exists and if_exists:
+            return None
+        if exists and database_name not in [
             "master",
             "model",
             "msdb",
@@ -40,6 +40,8 @@ the ID.
       username: <cimc username>
       password: <cimc password>
       verify_ssl: True
+      timeout: 60
+      cache_ttl: 5
 
 proxytype
 ^^^^^^^^^
@@ -64,13 +66,52 @@ password
 ^^^^^^^^
 
 The password used to login to the cimc host. Required.
+
+verify_ssl
+^^^^^^^^^^
+
+Whether to verify the SSL certificate presented by the cimc host. Defaults to
+``True``. Certificates are checked against the ``ca_bundle`` of the proxy
+minion, and the ``proxy_host``, ``proxy_port``, ``proxy_username`` and
+``proxy_password`` settings are honored, as with ``http.query``.
+
+timeout
+^^^^^^^
+
+The number of seconds to wait for the cimc host to answer a request. Defaults
+to ``60``.
+
+cache_ttl
+^^^^^^^^^
+
+The number of seconds results of read-only class queries are cached for, so
+repeated ``cimc.get_*`` calls within a state run do not query the device again.
+Any configuration change clears the cache. Set to ``0`` to disable caching.
+Defaults to ``5``.
+
+All requests made by a proxy minion process share a single keep-alive HTTPS
+session, so consecutive calls do not pay for a new TCP and TLS handshake each
+time. Jobs running in a forked process open their own session.
 """
 
+import copy
 import logging
+import os
 import re
+import time
 import xml.etree.ElementTree as ET
 
 import salt.exceptions
+import salt.utils.http
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
 
 # This must be present or the Salt loader won't load this module.
 __proxyenabled__ = ["cimc"]
@@ -85,11 +126,35 @@ log = logging.getLogger(__file__)
 # Define the module's virtual name
 __virtualname__ = "cimc"
 
+# XML API request payloads.
+_TMPL_LOGIN = "<aaaLogin inName='{username}' inPassword='{password}'></aaaLogin>"
+_TMPL_LOGOUT = '<aaaLogout cookie="{cookie}" inCookie="{cookie}"></aaaLogout>'
+_TMPL_CONFIG_CONF_MO = (
+    '<configConfMo cookie="{cookie}" inHierarchical="{hierarchical}" dn="{dn}">'
+    "<inConfig>{inconfig}</inConfig></configConfMo>"
+)
+_TMPL_CONFIG_CONF_MOS = (
+    '<configConfMos cookie="{cookie}" inHierarchical="{hierarchical}">'
+    "<inConfigs>{inconfigs}</inConfigs></configConfMos>"
+)
+_TMPL_CONFIG_CONF_MOS_PAIR = '<pair key="{dn}">{inconfig}</pair>'
+_TMPL_CONFIG_RESOLVE_CLASS = (
+    '<configResolveClass cookie="{cookie}" inHierarchical="{hierarchical}"'
+    ' classId="{cid}"/>'
+)
+_TMPL_CONFIG_RESOLVE_CLASSES = (
+    '<configResolveClasses cookie="{cookie}" inHierarchical="{hierarchical}">'
+    "<inIds>{ids}</inIds></configResolveClasses>"
+)
+_TMPL_CONFIG_RESOLVE_CLASSES_ID = '<Id value="{cid}"/>'
+
 
 def __virtual__():
     """
     Only return if all the modules are available.
     """
+    if not HAS_REQUESTS:
+        return False, "The cimc proxy module requires the requests library."
     return __virtualname__
 
 
@@ -104,6 +169,93 @@ def _validate_response_code(response_code_to_check, cookie_to_logout=None):
         )
 
 
+def _get_session():
+    """
+    Return the persistent HTTPS session used to talk to the cimc host,
+    creating it on first use in the current process.
+    """
+    session = DETAILS.get("session")
+    if session is not None and DETAILS.get("session_pid") != os.getpid():
+        # The session was inherited from the parent process, sharing its
+        # sockets would corrupt the TLS state of both processes. Drop it
+        # without closing it, the connections still belong to the parent.
+        session = None
+    if session is None:
+        session = requests.Session()
+        # Honor the ca_bundle and proxy_* settings like http.query does
+        salt.utils.http.configure_session(
+            session, DETAILS["url"], __opts__, verify_ssl=DETAILS["verify_ssl"]
+        )
+        session.headers.update(DETAILS["headers"])
+        session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=4,
+                max_retries=Retry(total=2, backoff_factor=0.2),
+            ),
+        )
+        DETAILS["session"] = session
+        DETAILS["session_pid"] = os.getpid()
+    return session
+
+
+def _close_session():
+    """
+    Close the persistent HTTPS session, if one is open.
+    """
+    session = DETAILS.pop("session", None)
+    if session is not None and DETAILS.pop("session_pid", None) == os.getpid():
+        session.close()
+
+
+def _post(payload):
+    """
+    Send an XML payload to the cimc host over the persistent session.
+    """
+    try:
+        r = _get_session().post(
+            DETAILS["url"], data=payload, timeout=DETAILS.get("timeout", 60)
+        )
+    except requests.exceptions.RequestException as err:
+        log.error("Unable to reach the cimc host: %s", err)
+        raise salt.exceptions.CommandExecutionError(
+            "Did not receive a valid response from host."
+        )
+    return {"status": r.status_code, "text": r.text}
+
+
+def _cache_get(key):
+    """
+    Return a copy of the cached result of a class query, or None if it is
+    missing or has expired.
+    """
+    entry = DETAILS.get("cache", {}).get(key)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return copy.deepcopy(entry[1])
+
+
+def _cache_set(key, value):
+    """
+    Cache the result of a class query for ``cache_ttl`` seconds.
+    """
+    ttl = DETAILS.get("cache_ttl", 5)
+    if ttl > 0:
+        # Keep a copy, the callers are free to modify the value they get
+        DETAILS.setdefault("cache", {})[key] = (
+            time.monotonic() + ttl,
+            copy.deepcopy(value),
+        )
+
+
+def _cache_clear():
+    """
+    Drop all cached class query results.
+    """
+    DETAILS.pop("cache", None)
+
+
 def init(opts):
     """
     This function gets called when the proxy starts up.
@@ -119,10 +271,14 @@ def init(opts):
         log.critical("No 'passwords' key found in pillar for this proxy.")
         return False
 
+    # Drop any session and results left over from a previous init so the
+    # new connection details are picked up.
+    _close_session()
+    _cache_clear()
+
     DETAILS["url"] = "https://{}/nuova".format(opts["proxy"]["host"])
     DETAILS["headers"] = {
         "Content-Type": "application/x-www-form-urlencoded",
-        "Content-Length": 62,
         "USER-Agent": "lwp-request/2.06",
     }
 
@@ -134,6 +290,8 @@ def init(opts):
     if verify_ssl is None:
         verify_ssl = True
     DETAILS["verify_ssl"] = verify_ssl
+    DETAILS["timeout"] = opts["proxy"].get("timeout", 60)
+    DETAILS["cache_ttl"] = opts["proxy"].get("cache_ttl", 5)
 
     # Ensure connectivity to the device
     log.debug("Attempting to connect to cimc proxy host.")
@@ -148,6 +306,7 @@ def set_config_modify(dn=None, inconfig=None, hierarchical=False):
     The configConfMo method configures the specified managed object in a single subtree (for example, DN).
     """
     ret = {}
+    _cache_clear()
     cookie = logon()
 
     # Declare if the search contains hierarchical results.
@@ -155,21 +314,43 @@ def set_config_modify(dn=None, inconfig=None, hierarchical=False):
     if hierarchical is True:
         h = "true"
 
-    payload = (
-        '<configConfMo cookie="{}" inHierarchical="{}" dn="{}">'
-        "<inConfig>{}</inConfig></configConfMo>".format(cookie, h, dn, inconfig)
+    payload = _TMPL_CONFIG_CONF_MO.format(
+        cookie=cookie, hierarchical=h, dn=dn, inconfig=inconfig
     )
-    r = __utils__["http.query"](
-        DETAILS["url"],
-        data=payload,
-        method="POST",
-        decode_type="plain",
-        decode=True,
-        verify_ssl=DETAILS["verify_ssl"],
-        raise_error=True,
-        status=True,
-        headers=DETAILS["headers"],
+    r = _post(payload)
+
+    _validate_response_code(r["status"], cookie)
+
+    answer = re.findall(r"(<[\s\S.]*>)", r["text"])[0]
+    items = ET.fromstring(answer)
+    logout(cookie)
+    for item in items:
+        ret[item.tag] = prepare_return(item)
+    return ret
+
+
+def set_config_modify_many(pairs=None, hierarchical=False):
+    """
+    The configConfMos method configures several managed objects in a single
+    request. ``pairs`` is a list of ``(dn, inconfig)`` tuples.
+    """
+    ret = {}
+    _cache_clear()
+    cookie = logon()
+
+    # Declare if the search contains hierarchical results.
+    h = "false"
+    if hierarchical is True:
+        h = "true"
+
+    inconfigs = "".join(
+        _TMPL_CONFIG_CONF_MOS_PAIR.format(dn=dn, inconfig=inconfig)
+        for dn, inconfig in pairs or []
+    )
+    payload = _TMPL_CONFIG_CONF_MOS.format(
+        cookie=cookie, hierarchical=h, inconfigs=inconfigs
     )
+    r = _post(payload)
 
     _validate_response_code(r["status"], cookie)
 
@@ -184,7 +365,13 @@ def set_config_modify(dn=None, inconfig=None, hierarchical=False):
 def get_config_resolver_class(cid=None, hierarchical=False):
     """
     The configResolveClass method returns requested managed object in a given class.
+    Results are cached for ``cache_ttl`` seconds.
     """
+    key = (cid, hierarchical is True)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
     ret = {}
     cookie = logon()
 
@@ -193,22 +380,8 @@ def get_config_resolver_class(cid=None, hierarchical=False):
     if hierarchical is True:
         h = "true"
 
-    payload = (
-        '<configResolveClass cookie="{}" inHierarchical="{}" classId="{}"/>'.format(
-            cookie, h, cid
-        )
-    )
-    r = __utils__["http.query"](
-        DETAILS["url"],
-        data=payload,
-        method="POST",
-        decode_type="plain",
-        decode=True,
-        verify_ssl=DETAILS["verify_ssl"],
-        raise_error=True,
-        status=True,
-        headers=DETAILS["headers"],
-    )
+    payload = _TMPL_CONFIG_RESOLVE_CLASS.format(cookie=cookie, hierarchical=h, cid=cid)
+    r = _post(payload)
 
     _validate_response_code(r["status"], cookie)
 
@@ -218,6 +391,58 @@ def get_config_resolver_class(cid=None, hierarchical=False):
 
     for item in items:
         ret[item.tag] = prepare_return(item)
+    # Errors are reported with a 200 status code, do not serve them from cache
+    if "errorCode" not in items.attrib:
+        _cache_set(key, ret)
+    return ret
+
+
+def get_config_resolver_classes(cids=None, hierarchical=False):
+    """
+    The configResolveClasses method returns the managed objects of several
+    classes in a single request. The result maps each class ID to the same
+    structure returned by get_config_resolver_class.
+    """
+    ret = {}
+    cids = cids or []
+    cookie = logon()
+
+    # Declare if the search contains hierarchical results.
+    h = "false"
+    if hierarchical is True:
+        h = "true"
+
+    ids = "".join(_TMPL_CONFIG_RESOLVE_CLASSES_ID.format(cid=cid) for cid in cids)
+    payload = _TMPL_CONFIG_RESOLVE_CLASSES.format(
+        cookie=cookie, hierarchical=h, ids=ids
+    )
+    r = _post(payload)
+
+    _validate_response_code(r["status"], cookie)
+
+    answer = re.findall(r"(<[\s\S.]*>)", r["text"])[0]
+    items = ET.fromstring(answer)
+    logout(cookie)
+
+    # Errors are reported with a 200 status code and no outConfigs
+    if "errorCode" in items.attrib:
+        error = items.attrib.get("errorDescr", items.attrib["errorCode"])
+        log.error("Unable to resolve the classes %s: %s", ", ".join(cids), error)
+        raise salt.exceptions.CommandExecutionError(
+            "Error resolving the requested classes: {}".format(error)
+        )
+
+    out_configs = {}
+    for item in items:
+        if item.tag == "outConfigs":
+            out_configs = prepare_return(item)
+
+    for cid in cids:
+        if cid in out_configs:
+            ret[cid] = {"outConfigs": {cid: out_configs[cid]}}
+        else:
+            ret[cid] = {"outConfigs": {}}
+        _cache_set((cid, hierarchical is True), ret[cid])
     return ret
 
 
@@ -226,20 +451,10 @@ def logon():
     Logs into the cimc device and returns the session cookie.
     """
     content = {}
-    payload = "<aaaLogin inName='{}' inPassword='{}'></aaaLogin>".format(
-        DETAILS["username"], DETAILS["password"]
-    )
-    r = __utils__["http.query"](
-        DETAILS["url"],
-        data=payload,
-        method="POST",
-        decode_type="plain",
-        decode=True,
-        verify_ssl=DETAILS["verify_ssl"],
-        raise_error=False,
-        status=True,
-        headers=DETAILS["headers"],
+    payload = _TMPL_LOGIN.format(
+        username=DETAILS["username"], password=DETAILS["password"]
     )
+    r = _post(payload)
 
     _validate_response_code(r["status"])
 
@@ -258,17 +473,8 @@ def logout(cookie=None):
     """
     Closes the session with the device.
     """
-    payload = '<aaaLogout cookie="{0}" inCookie="{0}"></aaaLogout>'.format(cookie)
-    __utils__["http.query"](
-        DETAILS["url"],
-        data=payload,
-        method="POST",
-        decode_type="plain",
-        decode=True,
-        verify_ssl=DETAILS["verify_ssl"],
-        raise_error=True,
-        headers=DETAILS["headers"],
-    )
+    payload = _TMPL_LOGOUT.format(cookie=cookie)
+    _post(payload)
     return
 
 
@@ -316,6 +522,7 @@ def grains_refresh():
     Refresh the grains from the proxied device
     """
     DETAILS["grains_cache"] = None
+    _cache_clear()
     return grains()
 
 
@@ -336,7 +543,8 @@ def ping():
 
 def shutdown():
     """
-    Shutdown the connection to the proxy device. For this proxy,
-    shutdown is a no-op.
+    Shutdown the connection to the proxy device, closing the persistent
+    HTTPS session.
     """
     log.debug("CIMC proxy shutdown() called.")
+    _close_session()
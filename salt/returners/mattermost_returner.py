@@ -46,7 +46,6 @@ To override individual configuration items, append --return_kwargs '{'key:': 'va
 import logging
 
 import salt.returners
-import salt.utils.json
 import salt.utils.mattermost
 
 log = logging.getLogger(__name__)
@@ -122,14 +121,22 @@ def event_return(events):
     username = _options.get("username")
     hook = _options.get("hook")
 
-    is_ok = True
+    # The events are sent in as few posts as the post size limit allows, to
+    # save a round-trip per event.
+    messages = []
     for event in events:
         log.debug("Event: %s", event)
         log.debug("Event data: %s", event["data"])
         message = "tag: {}\r\n".format(event["tag"])
         for key, value in event["data"].items():
             message += f"{key}: {value}\r\n"
-        result = post_message(channel, message, username, api_url, hook)
+        messages.append(message)
+
+    is_ok = True
+    # Leave room for the code block markers added by post_message
+    size = salt.utils.mattermost.MAX_POST_SIZE - 6
+    for text in salt.utils.mattermost.split_messages(messages, size):
+        result = post_message(channel, text, username, api_url, hook)
         if not result:
             is_ok = False
 
@@ -152,12 +159,10 @@ def post_message(channel, message, username, api_url, hook):
         parameters["channel"] = channel
     if username:
         parameters["username"] = username
-    parameters["text"] = "```" + message + "```"  # pre-formatted, fixed-width text
+    parameters["text"] = f"```{message}```"  # pre-formatted, fixed-width text
     log.debug("Parameters: %s", parameters)
     result = salt.utils.mattermost.query(
-        api_url=api_url,
-        hook=hook,
-        data=f"payload={salt.utils.json.dumps(parameters)}",
+        api_url=api_url, hook=hook, json=parameters, opts=__opts__
     )
 
     log.debug("result %s", result)
@@ -37,6 +37,7 @@ try:
     import html.parser
 
     import requests
+    from requests.adapters import HTTPAdapter
 
     HAS_LIBS = True
 
@@ -63,6 +64,13 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
+# Reuse the connections to the ASAM servers instead of doing a TLS handshake
+# for every request
+_SESSION = None
+if HAS_LIBS:
+    _SESSION = requests.Session()
+    _SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 
 def __virtual__():
     """
@@ -146,7 +154,7 @@ def _get_asam_configuration(driver_url=""):
 
 
 def _make_post_request(url, data, auth, verify=True):
-    r = requests.post(url, data=data, auth=auth, verify=verify, timeout=120)
+    r = _SESSION.post(url, data=data, auth=auth, verify=verify, timeout=120)
     if r.status_code != requests.codes.ok:
         r.raise_for_status()
     else:
@@ -16,8 +16,6 @@ Module for sending messages to Mattermost
 
 import logging
 
-import salt.utils.json
-
 # pylint: disable=import-error,no-name-in-module,redefined-builtin
 import salt.utils.mattermost
 
@@ -125,11 +123,10 @@ def post_message(message, channel=None, username=None, api_url=None, hook=None):
         parameters["channel"] = channel
     if username:
         parameters["username"] = username
-    parameters["text"] = "```" + message + "```"  # pre-formatted, fixed-width text
+    parameters["text"] = f"```{message}```"  # pre-formatted, fixed-width text
     log.debug("Parameters: %s", parameters)
-    data = salt.utils.json.dumps(parameters)
     result = salt.utils.mattermost.query(
-        api_url=api_url, hook=hook, data=f"payload={data}"
+        api_url=api_url, hook=hook, json=parameters, opts=__opts__
     )
 
     if result:
@@ -18,20 +18,75 @@ A state module to manage blockdevices
 
 
 .. versionadded:: 2014.7.0
+
+The ``blockdev.tuned`` states of a run can tune their devices in parallel
+threads by enabling both aggregation and ``blockdev_parallel`` in the minion
+configuration. Each device must only be managed by one of these states.
+States using requisites, ``onlyif`` or ``unless`` are always tuned on their
+own.
+
+.. code-block:: yaml
+
+    state_aggregate:
+      - blockdev
+    blockdev_parallel: True
+
+.. versionadded:: 3008.0
+
+When neither ``lsblk`` nor libblkid can tell the filesystem of a device,
+``blkid`` is run directly. Set ``blockdev_use_cmdrun`` in the minion
+configuration to run it through :py:func:`cmd.run <salt.modules.cmdmod.run>`
+instead, for instance to apply the environment Salt manages for commands.
+
+.. code-block:: yaml
+
+    blockdev_use_cmdrun: True
+
+.. versionadded:: 3008.0
 """
 
+import concurrent.futures
 import logging
 import os
-import os.path
+import stat
+import subprocess
 import time
 
+import salt.utils.blkid
+import salt.utils.blockdev_batch
 import salt.utils.path
+import salt.utils.stringutils
+from salt.state import STATE_REQUISITE_IN_KEYWORDS as _STATE_REQUISITE_IN_KEYWORDS
+from salt.state import STATE_REQUISITE_KEYWORDS as _STATE_REQUISITE_KEYWORDS
 
 __virtualname__ = "blockdev"
 
 # Init logger
 log = logging.getLogger(__name__)
 
+# disk.dump switches reporting the value of each tuned option
+_KWARG_MAP = {
+    "read-ahead": "getra",
+    "filesystem-read-ahead": "getfra",
+    "read-only": "getro",
+    "read-write": "getro",
+}
+_KWARG_KEYS = frozenset(_KWARG_MAP)
+
+# States using any of these keywords may not run at all, they are never tuned
+# together with other states
+_UNBATCHABLE_KEYWORDS = (
+    _STATE_REQUISITE_KEYWORDS
+    | _STATE_REQUISITE_IN_KEYWORDS
+    | {"onlyif", "unless", "creates", "check_cmd", "parallel", "retry"}
+)
+
+# blkid command reporting the filesystem type, the device name is appended
+_BLKID_ARGV_TEMPLATE = ["blkid", "-o", "value", "-s", "TYPE"]
+
+# Paths of the mkfs.<fs_type> binaries found so far, keyed by fs_type
+_MKFS_PATH_CACHE = {}
+
 
 def __virtual__():
     """
@@ -70,40 +125,58 @@ def tuned(name, **kwargs):
 
     ret = {"changes": {}, "comment": "", "name": name, "result": True}
 
-    kwarg_map = {
-        "read-ahead": "getra",
-        "filesystem-read-ahead": "getfra",
-        "read-only": "getro",
-        "read-write": "getro",
-    }
-
-    if not __salt__["file.is_blkdev"]:
+    if not __salt__["file.is_blkdev"](name):
         ret["comment"] = "Changes to {} cannot be applied. Not a block device. ".format(
             name
         )
+        ret["result"] = False
+        return ret
     elif __opts__["test"]:
         ret["comment"] = f"Changes to {name} will be applied "
         ret["result"] = None
+        # Preview the changes when lsblk already ran, without probing the
+        # device on its own
+        current = _batcher().probed and _lsblk_dump(name, kwargs)
+        if current:
+            pending = _pending(current, kwargs)
+            if not pending:
+                ret["comment"] = f"Block device {name} already in correct state"
+                ret["result"] = True
+                return ret
+            projected = {
+                _KWARG_MAP[key]: _desired(key, value) for key, value in pending.items()
+            }
+            ret["changes"] = _changeset(current, projected, pending)
         return ret
     else:
-        current = __salt__["disk.dump"](name)
-        changes = __salt__["disk.tune"](name, **kwargs)
-        changeset = {}
-        for key in kwargs:
-            if key in kwarg_map:
-                switch = kwarg_map[key]
-                if current[switch] != changes[switch]:
-                    if isinstance(kwargs[key], bool):
-                        old = current[switch] == "1"
-                        new = changes[switch] == "1"
-                    else:
-                        old = current[switch]
-                        new = changes[switch]
-                    if key == "read-write":
-                        old = not old
-                        new = not new
-                    changeset[key] = f"Changed from {old} to {new}"
+        # Tune the devices grouped by mod_aggregate now that the requisites
+        # of this state are met
+        group = __context__.get("blockdev.groups", {}).pop(name, None)
+        if group:
+            _run_batched(group)
+        batched = __context__.get("blockdev.batched", {}).pop(name, None)
+        if batched is not None:
+            current, changes = batched
+        else:
+            # An earlier state may have changed the device, do not compare
+            # against the options lsblk reported before it ran
+            _batcher().invalidate()
+            current = _dump(name, kwargs)
+        if not current:
+            ret["comment"] = (
+                f"Failed to read the current options of block device {name}"
+            )
+            ret["result"] = False
+            return ret
+        pending = _pending(current, kwargs)
+        if not pending:
+            ret["comment"] = f"Block device {name} already in correct state"
+            return ret
+        if batched is None:
+            changes = __salt__["disk.tune"](name, **pending)
+            _batcher().invalidate(name)
         if changes:
+            changeset = _changeset(current, changes, pending)
             if changeset:
                 ret["comment"] = f"Block device {name} successfully modified "
                 ret["changes"] = changeset
@@ -115,7 +188,173 @@ def tuned(name, **kwargs):
     return ret
 
 
-def formatted(name, fs_type="ext4", force=False, **kwargs):
+def mod_aggregate(low, chunks, running):
+    """
+    Group the block devices of the pending ``blockdev.tuned`` states so that
+    they are tuned at once when ``blockdev_parallel`` is enabled in the
+    minion configuration. This requires ``blockdev`` to be listed in
+    ``state_aggregate``.
+
+    Nothing is tuned here, the group is tuned by the state ``low`` once its
+    requisites are met. States using requisites, ``onlyif`` or ``unless``
+    are left out of the group and tuned on their own.
+
+    .. versionadded:: 3008.0
+    """
+    if (
+        low.get("fun") != "tuned"
+        or __opts__["test"]
+        or not __opts__.get("blockdev_parallel", False)
+    ):
+        return low
+    low_tag = __utils__["state.gen_tag"](low)
+    devices = {low["name"]: {key: low[key] for key in _KWARG_KEYS & low.keys()}}
+    for chunk in chunks:
+        if chunk.get("state") != "blockdev" or chunk.get("fun") != "tuned":
+            continue
+        tag = __utils__["state.gen_tag"](chunk)
+        if tag == low_tag or tag in running or "__agg__" in chunk:
+            continue
+        if _UNBATCHABLE_KEYWORDS & chunk.keys():
+            continue
+        if chunk["name"] in devices:
+            # Concurrent probes of the same device are not supported, the
+            # later states tune it on their own
+            continue
+        devices[chunk["name"]] = {key: chunk[key] for key in _KWARG_KEYS & chunk.keys()}
+        chunk["__agg__"] = True
+    if len(devices) > 1:
+        __context__.setdefault("blockdev.groups", {})[low["name"]] = devices
+    return low
+
+
+def _run_batched(devices):
+    """
+    Run disk.dump and disk.tune for the devices concurrently, devices maps
+    each device name to its tuned options. The results are kept for tuned()
+    to report. Every device must only be listed once.
+
+    A device whose dump or tune raises is left out of the results, its state
+    then tunes it on its own and reports the error.
+    """
+    batched = __context__.setdefault("blockdev.batched", {})
+    # Probe the devices again, earlier states may have changed them
+    _batcher().invalidate()
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(32, len(devices))
+    ) as pool:
+        dumps = {}
+        for name, options in devices.items():
+            if not __salt__["file.is_blkdev"](name):
+                continue
+            # Only the disk.dump calls go to the pool, the lsblk probe is
+            # shared through __context__
+            current = _lsblk_dump(name, options)
+            if current is None:
+                current = pool.submit(__salt__["disk.dump"], name)
+            dumps[name] = current
+        tunes = {}
+        for name, current in dumps.items():
+            if isinstance(current, concurrent.futures.Future):
+                try:
+                    current = current.result()
+                except Exception as exc:  # pylint: disable=broad-except
+                    log.error("Failed to read the options of %s: %s", name, exc)
+                    continue
+            pending = current and _pending(current, devices[name])
+            if pending:
+                tunes[name] = pool.submit(__salt__["disk.tune"], name, **pending)
+            batched[name] = (current, None)
+        for name, future in tunes.items():
+            _batcher().invalidate(name)
+            try:
+                batched[name] = (batched[name][0], future.result())
+            except Exception as exc:  # pylint: disable=broad-except
+                log.error("Failed to tune %s: %s", name, exc)
+                del batched[name]
+
+
+def _dump(name, options):
+    """
+    Return the current values of the tuned options of the device
+    """
+    current = _lsblk_dump(name, options)
+    if current is None:
+        current = __salt__["disk.dump"](name)
+    return current
+
+
+def _lsblk_dump(name, options):
+    """
+    Return the current values of the tuned options from the batched lsblk
+    probe, or None if it does not report all of them
+    """
+    if "filesystem-read-ahead" in options:
+        # Only getro and getra are known from lsblk
+        return None
+    return _batcher().dump(name)
+
+
+def _pending(current, options):
+    """
+    Return the tuned options which differ from the current ones
+    """
+    return {
+        key: options[key]
+        for key in _KWARG_KEYS & options.keys()
+        if _differs(current, _KWARG_MAP[key], key, options[key])
+    }
+
+
+def _changeset(current, changes, options):
+    """
+    Describe the changes of the tuned options between the values reported
+    by disk.dump before and after tuning
+    """
+    changeset = {}
+    for key in options:
+        switch = _KWARG_MAP[key]
+        if current[switch] != changes[switch]:
+            if isinstance(options[key], bool):
+                old = current[switch] == "1"
+                new = changes[switch] == "1"
+            else:
+                old = current[switch]
+                new = changes[switch]
+            if key == "read-write":
+                old = not old
+                new = not new
+            changeset[key] = f"Changed from {old} to {new}"
+    return changeset
+
+
+def _desired(key, value):
+    """
+    Return the value disk.dump reports once the tuned option is applied
+    """
+    if isinstance(value, bool):
+        # read-write is reported through getro, so its value is inverted
+        return "1" if value != (key == "read-write") else "0"
+    return str(value)
+
+
+def _differs(current, switch, key, value):
+    """
+    Check whether the requested value of a tuned option differs from the
+    current value reported by disk.dump
+    """
+    return current.get(switch) != _desired(key, value)
+
+
+def formatted(
+    name,
+    fs_type="ext4",
+    force=False,
+    poll_backoff_min=0.05,
+    poll_backoff_max=1.0,
+    poll_timeout=30,
+    **kwargs,
+):
     """
     Manage filesystems of partitions.
 
@@ -133,6 +372,25 @@ def formatted(name, fs_type="ext4", force=False, **kwargs):
         This option is dangerous, use it with caution.
 
         .. versionadded:: 2016.11.0
+
+    poll_backoff_min
+        Seconds to wait before the first re-check of the filesystem type once
+        the device has been formatted. The wait grows by a factor of 1.3 after
+        each check. Defaults to ``0.05``.
+
+        .. versionadded:: 3008.0
+
+    poll_backoff_max
+        Maximum number of seconds to wait between two checks of the
+        filesystem type. Defaults to ``1.0``.
+
+        .. versionadded:: 3008.0
+
+    poll_timeout
+        Number of seconds to keep checking the filesystem type before giving
+        up. Defaults to ``30``.
+
+        .. versionadded:: 3008.0
     """
     ret = {
         "changes": {},
@@ -141,16 +399,31 @@ def formatted(name, fs_type="ext4", force=False, **kwargs):
         "result": False,
     }
 
-    if not os.path.exists(name):
+    # A single stat tells whether the target exists and what it is. Fail
+    # fast instead of polling blkid on something that is not a block device,
+    # unless mkfs is forced to format it anyway
+    try:
+        st = os.stat(name)
+    except FileNotFoundError:
         ret["comment"] = f"{name} does not exist"
         return ret
+    except OSError as exc:
+        ret["comment"] = f"Unable to stat {name}: {exc}"
+        return ret
+    if not force and not stat.S_ISBLK(st.st_mode):
+        ret["comment"] = f"{name} is not a block device"
+        return ret
 
-    current_fs = _checkblk(name)
+    if stat.S_ISREG(st.st_mode) and st.st_size == 0:
+        # An empty file cannot hold a filesystem
+        current_fs = ""
+    else:
+        current_fs = _checkblk(name)
 
     if current_fs == fs_type:
         ret["result"] = True
         return ret
-    elif not salt.utils.path.which(f"mkfs.{fs_type}"):
+    elif not _mkfs_path(fs_type):
         ret["comment"] = f"Invalid fs_type: {fs_type}"
         ret["result"] = False
         return ret
@@ -160,14 +433,18 @@ def formatted(name, fs_type="ext4", force=False, **kwargs):
         return ret
 
     __salt__["disk.format"](name, fs_type, force=force, **kwargs)
+    _batcher().invalidate(name)
 
-    # Repeat fstype check up to 10 times with 3s sleeping between each
+    # Repeat fstype check with an exponential backoff until poll_timeout
     # to avoid detection failing although mkfs has succeeded
     # see https://github.com/saltstack/salt/issues/25775
     # This retry maybe superfluous - switching to blkid
-    for i in range(10):
-
-        log.info("Check blk fstype attempt %d of 10", i + 1)
+    delay = poll_backoff_min
+    deadline = time.monotonic() + poll_timeout
+    attempt = 0
+    while True:
+        attempt += 1
+        log.info("Check blk fstype attempt %d", attempt)
         current_fs = _checkblk(name)
 
         if current_fs == fs_type:
@@ -176,23 +453,81 @@ def formatted(name, fs_type="ext4", force=False, **kwargs):
             ret["result"] = True
             return ret
 
-        if current_fs == "":
-            log.info("Waiting 3s before next check")
-            time.sleep(3)
-        else:
+        remaining = deadline - time.monotonic()
+        if current_fs != "" or remaining <= 0:
             break
 
+        delay = min(delay, remaining)
+        log.info("Waiting %.2fs before next check", delay)
+        time.sleep(delay)
+        delay = min(delay * 1.3, poll_backoff_max)
+
     ret["comment"] = f"Failed to format {name}"
     ret["result"] = False
     return ret
 
 
-def _checkblk(name):
+def _mkfs_path(fs_type):
     """
-    Check if the blk exists and return its fstype if ok
+    Return the path of the mkfs binary for fs_type, or None if it is not
+    installed. Only successful lookups are cached, so a binary installed by an
+    earlier state in the same run is still picked up.
+    """
+    mkfs_path = _MKFS_PATH_CACHE.get(fs_type)
+    if mkfs_path is None:
+        mkfs_path = salt.utils.path.which(f"mkfs.{fs_type}")
+        if mkfs_path:
+            _MKFS_PATH_CACHE[fs_type] = mkfs_path
+    return mkfs_path
+
+
+def _reset_mkfs_cache():
+    """
+    Forget the mkfs binaries found so far
     """
+    _MKFS_PATH_CACHE.clear()
 
-    blk = __salt__["cmd.run"](
-        ["blkid", "-o", "value", "-s", "TYPE", name], ignore_retcode=True
+
+def _batcher():
+    """
+    Return the batcher holding the lsblk output of all the block devices
+    """
+    return salt.utils.blockdev_batch.BlockDevBatcher(
+        __context__, __salt__["cmd.run_all"]
     )
-    return "" if not blk else blk
+
+
+def _checkblk(name):
+    """
+    Check if the blk exists and return its fstype if ok
+    """
+    # The device is always probed directly. The filesystem lsblk reports
+    # comes from the udev database, which is not updated when an earlier
+    # state wipes or formats the device.
+
+    # Probe in-process through libblkid when possible, it is much cheaper
+    # than running blkid in the retry loop of formatted()
+    fstype = salt.utils.blkid.fstype(name)
+    if fstype is not None:
+        return fstype
+
+    argv = _BLKID_ARGV_TEMPLATE + [name]
+    if __opts__.get("blockdev_use_cmdrun", False):
+        # Run blkid in the environment managed by cmd.run
+        blk = __salt__["cmd.run"](argv, ignore_retcode=True)
+        return "" if not blk else blk
+
+    try:
+        proc = subprocess.run(
+            argv,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            close_fds=True,
+            # Reset the locale like cmd.run does
+            env=dict(os.environ, LC_ALL="C", LANGUAGE="C"),
+            check=False,
+        )
+    except OSError as exc:
+        log.debug("Unable to run blkid: %s", exc)
+        return ""
+    return salt.utils.stringutils.to_unicode(proc.stdout).strip()
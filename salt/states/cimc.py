@@ -370,7 +370,8 @@ def syslog(name, primary=None, secondary=None):
 
     conf = __salt__["cimc.get_syslog"]()
 
-    req_change = False
+    # Both servers are queued and applied to the device in a single request.
+    changes = []
 
     if primary:
         prim_change = True
@@ -382,43 +383,38 @@ def syslog(name, primary=None, secondary=None):
                     prim_change = False
 
         if prim_change:
-            try:
-                update = __salt__["cimc.set_syslog_server"](primary, "primary")
-                if update["outConfig"]["commSyslogClient"][0]["status"] == "modified":
-                    req_change = True
-                else:
-                    ret["result"] = False
-                    ret["comment"] = "Error setting primary SYSLOG server."
-                    return ret
-            except Exception as err:  # pylint: disable=broad-except
-                ret["result"] = False
-                ret["comment"] = "Error setting primary SYSLOG server."
-                log.error(err)
-                return ret
+            __salt__["cimc.set_syslog_server"](primary, "primary", batch=changes)
 
     if secondary:
         sec_change = True
-        if "outConfig" in conf and "commSyslogClient" in conf["outConfig"]:
-            for entry in conf["outConfig"]["commSyslogClient"]:
+        if "outConfigs" in conf and "commSyslogClient" in conf["outConfigs"]:
+            for entry in conf["outConfigs"]["commSyslogClient"]:
                 if entry["name"] != "secondary":
                     continue
                 if entry["adminState"] == "enabled" and entry["hostname"] == secondary:
                     sec_change = False
 
         if sec_change:
-            try:
-                update = __salt__["cimc.set_syslog_server"](secondary, "secondary")
-                if update["outConfig"]["commSyslogClient"][0]["status"] == "modified":
-                    req_change = True
-                else:
+            __salt__["cimc.set_syslog_server"](secondary, "secondary", batch=changes)
+
+    req_change = False
+    if changes:
+        try:
+            update = __salt__["cimc.batch"](*changes)
+            for pair in update["outConfigs"]["pair"]:
+                client = pair["commSyslogClient"][0]
+                if client["status"] != "modified":
                     ret["result"] = False
-                    ret["comment"] = "Error setting secondary SYSLOG server."
+                    ret["comment"] = "Error setting {} SYSLOG server.".format(
+                        client["name"]
+                    )
                     return ret
-            except Exception as err:  # pylint: disable=broad-except
-                ret["result"] = False
-                ret["comment"] = "Error setting secondary SYSLOG server."
-                log.error(err)
-                return ret
+            req_change = True
+        except Exception as err:  # pylint: disable=broad-except
+            ret["result"] = False
+            ret["comment"] = "Error setting SYSLOG servers."
+            log.error(err)
+            return ret
 
     if req_change:
         ret["changes"]["before"] = conf
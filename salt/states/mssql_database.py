@@ -11,7 +11,8 @@ and manage SQL Server Databases
       mssql_database.present
 """
 
-import collections
+import inspect
+from collections.abc import Mapping
 
 
 def __virtual__():
@@ -24,17 +25,45 @@ def __virtual__():
 
 
 def _normalize_options(options):
-    if type(options) in [dict, collections.OrderedDict]:
+    if not options:
+        # No options were given, e.g. present() was called without them
+        return []
+    if isinstance(options, Mapping):
         return [f"{k}={v}" for k, v in options.items()]
-    if type(options) is list and (not options or type(options[0]) is str):
+    if not isinstance(options, list):
+        # Invalid options
+        return []
+    if isinstance(options[0], str):
         return options
-    # Invalid options
-    if type(options) is not list or type(options[0]) not in [
-        dict,
-        collections.OrderedDict,
-    ]:
+    if not isinstance(options[0], Mapping):
+        # Invalid options
         return []
-    return [o for d in options for o in _normalize_options(d)]
+    return [f"{k}={v}" for d in options if isinstance(d, Mapping) for k, v in d.items()]
+
+
+def _cache_key(name, kwargs):
+    # The connection arguments are part of the key, databases with the same
+    # name may live on different servers
+    return (name, repr(sorted(kwargs.items())))
+
+
+def _db_exists(name, **kwargs):
+    """
+    Return whether the database exists, the result is cached for the run
+    """
+    cache = __context__.setdefault("mssql_db_exists_cache", {})
+    key = _cache_key(name, kwargs)
+    if key not in cache:
+        cache[key] = __salt__["mssql.db_exists"](name, **kwargs)
+    return cache[key]
+
+
+def _set_db_exists(name, exists, **kwargs):
+    """
+    Record the new state of the database after creating or removing it
+    """
+    cache = __context__.setdefault("mssql_db_exists_cache", {})
+    cache[_cache_key(name, kwargs)] = exists
 
 
 def present(name, containment="NONE", options=None, **kwargs):
@@ -50,7 +79,7 @@ def present(name, containment="NONE", options=None, **kwargs):
     """
     ret = {"name": name, "changes": {}, "result": True, "comment": ""}
 
-    if __salt__["mssql.db_exists"](name, **kwargs):
+    if _db_exists(name, **kwargs):
         ret["comment"] = (
             "Database {} is already present (Not going to try to set its options)".format(
                 name
@@ -76,11 +105,37 @@ def present(name, containment="NONE", options=None, **kwargs):
             name, db_created
         )
         return ret
+    _set_db_exists(name, True, **kwargs)
     ret["comment"] += f"Database {name} has been added"
     ret["changes"][name] = "Present"
     return ret
 
 
+def _try_remove(name, **kwargs):
+    """
+    Remove the database, returning True if it has been removed, None if it
+    was not present and False if it failed to be removed
+    """
+    cache = __context__.setdefault("mssql_db_exists_cache", {})
+    if cache.get(_cache_key(name, kwargs)) is False:
+        return None
+    db_remove = __salt__["mssql.db_remove"]
+    if "if_exists" in inspect.signature(db_remove).parameters:
+        # db_remove reports a missing database itself, skip the round-trip
+        removed = db_remove(name, if_exists=True, **kwargs)
+    elif not _db_exists(name, **kwargs):
+        removed = None
+    else:
+        removed = db_remove(name, **kwargs)
+    if removed is None:
+        _set_db_exists(name, False, **kwargs)
+        return None
+    if removed is True:
+        _set_db_exists(name, False, **kwargs)
+        return True
+    return False
+
+
 def absent(name, **kwargs):
     """
     Ensure that the named database is absent
@@ -90,14 +145,18 @@ def absent(name, **kwargs):
     """
     ret = {"name": name, "changes": {}, "result": True, "comment": ""}
 
-    if not __salt__["mssql.db_exists"](name):
-        ret["comment"] = f"Database {name} is not present"
-        return ret
     if __opts__["test"]:
+        if not _db_exists(name, **kwargs):
+            ret["comment"] = f"Database {name} is not present"
+            return ret
         ret["result"] = None
         ret["comment"] = f"Database {name} is set to be removed"
         return ret
-    if __salt__["mssql.db_remove"](name, **kwargs):
+    removed = _try_remove(name, **kwargs)
+    if removed is None:
+        ret["comment"] = f"Database {name} is not present"
+        return ret
+    if removed:
         ret["comment"] = f"Database {name} has been removed"
         ret["changes"][name] = "Absent"
         return ret
@@ -0,0 +1,76 @@
+"""
+Probe block devices in-process through libblkid
+
+.. versionadded:: 3008.0
+"""
+
+import ctypes.util
+import logging
+from ctypes import CDLL, byref, c_char_p, c_int, c_size_t, c_void_p
+
+import salt.utils.stringutils
+
+log = logging.getLogger(__name__)
+
+# The loaded libblkid handle, False when the library is not available
+_LIBBLKID = None
+
+
+def _load_libblkid():
+    """
+    Load libblkid and declare the prototypes of the functions used. The
+    handle is cached for the lifetime of the process.
+    """
+    global _LIBBLKID
+    if _LIBBLKID is None:
+        try:
+            lib = CDLL(ctypes.util.find_library("blkid") or "libblkid.so.1")
+            lib.blkid_new_probe_from_filename.argtypes = [c_char_p]
+            lib.blkid_new_probe_from_filename.restype = c_void_p
+            lib.blkid_do_safeprobe.argtypes = [c_void_p]
+            lib.blkid_do_safeprobe.restype = c_int
+            lib.blkid_probe_lookup_value.argtypes = [
+                c_void_p,
+                c_char_p,
+                ctypes.POINTER(c_char_p),
+                ctypes.POINTER(c_size_t),
+            ]
+            lib.blkid_probe_lookup_value.restype = c_int
+            lib.blkid_free_probe.argtypes = [c_void_p]
+            lib.blkid_free_probe.restype = None
+            _LIBBLKID = lib
+        except (OSError, AttributeError) as exc:
+            log.debug("libblkid is not available: %s", exc)
+            _LIBBLKID = False
+    return _LIBBLKID or None
+
+
+def fstype(device):
+    """
+    Return the filesystem type of ``device``, or an empty string if no
+    filesystem is found on it.
+
+    Returns None when libblkid is not available or the device cannot be
+    probed, so callers can fall back to running the ``blkid`` command.
+    """
+    lib = _load_libblkid()
+    if lib is None:
+        return None
+
+    probe = lib.blkid_new_probe_from_filename(salt.utils.stringutils.to_bytes(device))
+    if not probe:
+        return None
+    try:
+        # 0 means a filesystem was found, 1 that there is nothing to find
+        ret = lib.blkid_do_safeprobe(probe)
+        if ret == 1:
+            return ""
+        if ret != 0:
+            return None
+        value = c_char_p()
+        size = c_size_t()
+        if lib.blkid_probe_lookup_value(probe, b"TYPE", byref(value), byref(size)):
+            return ""
+        return salt.utils.stringutils.to_unicode(value.value)
+    finally:
+        lib.blkid_free_probe(probe)
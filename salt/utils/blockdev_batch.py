@@ -0,0 +1,122 @@
+"""
+Probe all the block devices of a minion at once
+
+Running ``blkid`` and ``blockdev`` for each ``blockdev`` state forks a couple
+of processes per device. The :py:class:`BlockDevBatcher` runs ``lsblk`` a
+single time instead and keeps the parsed result in ``__context__`` so that
+the devices tuned together can look their options up. The snapshot goes stale
+as soon as a state changes a device, callers :py:meth:`invalidate
+<BlockDevBatcher.invalidate>` it before reading it again.
+
+.. versionadded:: 3008.0
+"""
+
+import logging
+import os.path
+
+import salt.utils.context
+import salt.utils.json
+
+log = logging.getLogger(__name__)
+
+CONTEXT_KEY = "blockdev_batch"
+
+LSBLK_CMD = ["lsblk", "-J", "-l", "-b", "-o", "NAME,FSTYPE,RO,RA,PATH,SIZE"]
+
+
+class BlockDevBatcher:
+    """
+    Cache the ``lsblk`` output of all the block devices, keyed by the
+    resolved path of each device
+
+    context
+        The dict the devices are cached in, usually ``__context__``
+
+    run_all
+        The function used to run ``lsblk``, usually ``__salt__["cmd.run_all"]``
+    """
+
+    def __init__(self, context, run_all):
+        self._context = context
+        self._run_all = run_all
+
+    @property
+    def probed(self):
+        """
+        Whether ``lsblk`` already ran during this run
+        """
+        return CONTEXT_KEY in self._context
+
+    @property
+    def devices(self):
+        """
+        The cached devices, ``lsblk`` is run on first access
+        """
+        if CONTEXT_KEY not in self._context:
+            self._context[CONTEXT_KEY] = self._probe()
+        return salt.utils.context.NamespacedDictWrapper(self._context, CONTEXT_KEY)
+
+    def _probe(self):
+        out = self._run_all(LSBLK_CMD, python_shell=False, ignore_retcode=True)
+        if out["retcode"] != 0:
+            log.debug("Unable to list block devices: %s", out["stderr"])
+            return {}
+        try:
+            blockdevices = salt.utils.json.loads(out["stdout"])["blockdevices"]
+        except (ValueError, KeyError, TypeError) as exc:
+            log.debug("Unable to parse the lsblk output: %s", exc)
+            return {}
+
+        devices = {}
+        for dev in blockdevices:
+            if not dev.get("path"):
+                continue
+            devices[os.path.realpath(dev["path"])] = dev
+        return devices
+
+    def get(self, name):
+        """
+        Return the ``lsblk`` entry of the device ``name``, or None if it is
+        unknown
+        """
+        return self.devices.get(os.path.realpath(name))
+
+    def fstype(self, name):
+        """
+        Return the filesystem type of ``name``, or None if the device is
+        unknown or lsblk does not report a filesystem on it. lsblk reads the
+        udev database, which may not know about a filesystem yet, so an
+        empty value does not prove that the device has no filesystem.
+        """
+        dev = self.get(name)
+        if dev is None:
+            return None
+        return dev.get("fstype") or None
+
+    def dump(self, name):
+        """
+        Return the ``getro`` and ``getra`` values of ``name`` the way
+        ``disk.dump`` reports them, or None if the device is unknown
+        """
+        dev = self.get(name)
+        if dev is None:
+            return None
+        try:
+            # lsblk reports the read-ahead in KiB, blockdev in 512-byte sectors.
+            # Older lsblk versions report the columns as strings.
+            return {
+                "getro": str(int(dev["ro"])),
+                "getra": str(int(dev["ra"]) * 2),
+            }
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def invalidate(self, name=None):
+        """
+        Forget the cached entry of ``name``, or of all the devices when
+        ``name`` is not given
+        """
+        if name is None:
+            self._context.pop(CONTEXT_KEY, None)
+        elif CONTEXT_KEY in self._context:
+            self._context[CONTEXT_KEY].pop(os.path.realpath(name), None)
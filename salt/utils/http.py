@@ -1065,6 +1065,49 @@ def _sanitize_url_components(comp_list, field):
         return ret + _sanitize_url_components(comp_list, field)
 
 
+def configure_session(sess, url, opts=None, verify_ssl=None):
+    """
+    Apply the ``ca_bundle``, ``verify_ssl``, ``cert`` and ``proxy_*`` options
+    in ``opts`` to the requests session ``sess`` used to reach ``url``, the
+    same way :py:func:`query` honors them. Return the session.
+
+    .. versionadded:: 3008.0
+    """
+    if opts is None:
+        opts = {}
+
+    if verify_ssl is None:
+        verify_ssl = opts.get("verify_ssl", True)
+    if verify_ssl:
+        sess.verify = get_ca_bundle(opts) or True
+    else:
+        sess.verify = False
+
+    cert = opts.get("cert", None)
+    if isinstance(cert, str) and os.path.exists(cert):
+        sess.cert = cert
+    elif isinstance(cert, list) and all(os.path.exists(path) for path in cert):
+        sess.cert = tuple(cert)
+
+    proxy_host = opts.get("proxy_host", None)
+    proxy_port = opts.get("proxy_port", None)
+    if (
+        proxy_host
+        and proxy_port
+        and urllib.parse.urlparse(url).hostname not in opts.get("no_proxy", [])
+    ):
+        proxy_username = opts.get("proxy_username", None)
+        proxy_password = opts.get("proxy_password", None)
+        if proxy_username and proxy_password:
+            http_proxy_url = (
+                f"http://{proxy_username}:{proxy_password}@{proxy_host}:{proxy_port}"
+            )
+        else:
+            http_proxy_url = f"http://{proxy_host}:{proxy_port}"
+        sess.proxies = {"http": http_proxy_url, "https": http_proxy_url}
+    return sess
+
+
 def session(user=None, password=None, verify_ssl=True, ca_bundle=None, headers=None):
     """
     create a requests session
@@ -15,42 +15,126 @@ import http.client
 import logging
 import urllib.parse
 
+import requests
+from requests.adapters import HTTPAdapter
+
 import salt.utils.http
-from salt.version import __version__
 
 log = logging.getLogger(__name__)
 
+# Keep-alive sessions reused across queries, keyed by the Mattermost host and
+# the values of the options the session was configured from.
+_SESSIONS = {}
+
+# Options applied to the sessions by salt.utils.http.configure_session
+_SESSION_OPTS = (
+    "verify_ssl",
+    "ca_bundle",
+    "cert",
+    "proxy_host",
+    "proxy_port",
+    "proxy_username",
+    "proxy_password",
+    "no_proxy",
+)
+
+# Default maximum number of characters of a Mattermost post
+MAX_POST_SIZE = 16383
 
-def query(hook=None, api_url=None, data=None):
+
+def _get_session(url, opts=None):
+    """
+    Return the persistent session for the host in ``url``, creating it on
+    first use. The ``ca_bundle``, ``verify_ssl`` and ``proxy_*`` settings
+    are taken from ``opts``, callers with different settings get different
+    sessions.
+    """
+    settings = opts or {}
+    key = (urllib.parse.urlsplit(url).netloc,) + tuple(
+        repr(settings.get(name)) for name in _SESSION_OPTS
+    )
+    session = _SESSIONS.get(key)
+    if session is None:
+        session = requests.Session()
+        salt.utils.http.configure_session(session, url, opts)
+        session.headers["Connection"] = "keep-alive"
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _SESSIONS[key] = session
+    return session
+
+
+def split_messages(messages, size=MAX_POST_SIZE, separator="\n"):
+    """
+    Join the messages into as few texts as possible, each at most ``size``
+    characters long. A message longer than ``size`` is returned on its own.
+
+    .. versionadded:: 3008.0
+
+    :param messages:    The list of messages to join.
+    :param size:        The maximum number of characters of each text.
+    :param separator:   The string inserted between two messages.
+    :return:            The list of texts.
+    """
+    texts = []
+    chunk = []
+    length = 0
+    for message in messages:
+        if chunk and length + len(separator) + len(message) > size:
+            texts.append(separator.join(chunk))
+            chunk = []
+        if chunk:
+            length += len(separator) + len(message)
+        else:
+            length = len(message)
+        chunk.append(message)
+    if chunk:
+        texts.append(separator.join(chunk))
+    return texts
+
+
+def query(hook=None, api_url=None, data=None, json=None, opts=None):
     """
     Mattermost object method function to construct and execute on the API URL.
     :param api_url:     The Mattermost API URL
     :param hook:        The Mattermost hook.
     :param data:        The data to be sent for POST method.
+    :param json:        The parameters to be sent as a JSON body for POST method.
+    :param opts:        The Salt configuration holding the proxy and CA settings.
     :return:            The json response from the API call or False.
     """
-    method = "POST"
-
     ret = {"message": "", "res": True}
 
     base_url = urllib.parse.urljoin(api_url, "/hooks/")
     url = urllib.parse.urljoin(base_url, str(hook))
 
-    result = salt.utils.http.query(url, method, data=data, decode=True, status=True)
+    try:
+        result = _get_session(url, opts).post(
+            url, data=data, json=json, timeout=(3, 10)
+        )
+    except requests.exceptions.RequestException as err:
+        log.error("Unable to post to Mattermost: %s", err)
+        ret["message"] = str(err)
+        ret["res"] = False
+        return ret
 
-    if result.get("status", None) == http.client.OK:
-        ret["message"] = f"Message posted {data} correctly"
+    if result.status_code == http.client.OK:
+        ret["message"] = f"Message posted {data or json} correctly"
         return ret
-    elif result.get("status", None) == http.client.NO_CONTENT:
+    elif result.status_code == http.client.NO_CONTENT:
         return True
     else:
         log.debug(url)
-        log.debug(data)
-        log.debug(result)
-        if "dict" in result:
-            _result = result["dict"]
+        log.debug(data or json)
+        log.debug(result.text)
+        try:
+            _result = result.json()
+        except ValueError:
+            _result = None
+        if isinstance(_result, dict):
             if "error" in _result:
-                ret["message"] = result["error"]
+                ret["message"] = _result["error"]
                 ret["res"] = False
                 return ret
             ret["message"] = "Message not posted"
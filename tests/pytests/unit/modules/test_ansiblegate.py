@@ -38,6 +38,13 @@ def test_ansible_module_help():
         ret = ansiblegate.help("foo")
         assert ret["description"] == extension["foo"]["doc"]["description"]
 
+        # The parsed documentation is reused for the following calls
+        ret = ansiblegate.help("foo", "return")
+        assert ret == {"return": {"a": "A return"}}
+        ret = ansiblegate.help("foo")
+        assert ret["examples"] == "These are the examples"
+        proc_run_mock.assert_called_once()
+
 
 def test_virtual_function(subtests):
     """
@@ -0,0 +1,133 @@
+"""
+Unit tests for the cimc execution module
+"""
+
+import pytest
+
+import salt.modules.cimc as cimc
+from salt.exceptions import CommandExecutionError
+from tests.support.mock import MagicMock
+
+
+@pytest.fixture
+def set_config_modify():
+    return MagicMock(return_value={"outConfig": {}})
+
+
+@pytest.fixture
+def set_config_modify_many():
+    return MagicMock(return_value={"outConfigs": {}})
+
+
+@pytest.fixture
+def get_config_resolver_classes():
+    return MagicMock(
+        side_effect=lambda cids, hierarchical: {
+            cid: {"hierarchical": hierarchical} for cid in cids
+        }
+    )
+
+
+@pytest.fixture
+def configure_loader_modules(
+    set_config_modify, set_config_modify_many, get_config_resolver_classes
+):
+    return {
+        cimc: {
+            "__proxy__": {
+                "cimc.set_config_modify": set_config_modify,
+                "cimc.set_config_modify_many": set_config_modify_many,
+                "cimc.get_config_resolver_classes": get_config_resolver_classes,
+            }
+        }
+    }
+
+
+def test_mount_share(set_config_modify):
+    cimc.mount_share(
+        name="WIN7",
+        remote_share="10.0.0.1:/nfs",
+        remote_file="image.iso",
+        username="bob",
+        password="secret",
+    )
+    set_config_modify.assert_called_once_with(
+        "sys/svc-ext/vmedia-svc/vmmap-WIN7",
+        "<commVMediaMap dn='sys/svc-ext/vmedia-svc/vmmap-WIN7' map='nfs'"
+        " mountOptions='username=bob,password=secret' remoteFile='image.iso'"
+        " remoteShare='10.0.0.1:/nfs' status='created' volumeName='Win12'/>",
+        False,
+    )
+
+
+def test_set_syslog_server(set_config_modify):
+    cimc.set_syslog_server("10.0.0.1", "secondary")
+    set_config_modify.assert_called_once_with(
+        "sys/svc-ext/syslog/client-secondary",
+        "<commSyslogClient name='secondary' adminState='enabled'"
+        " hostname='10.0.0.1' dn='sys/svc-ext/syslog/client-secondary'/>",
+        False,
+    )
+
+
+def test_set_logging_levels(set_config_modify):
+    cimc.set_logging_levels(remote="error", local="notice")
+    set_config_modify.assert_called_once_with(
+        "sys/svc-ext/syslog",
+        '<commSyslog dn="sys/svc-ext/syslog" remoteSeverity="error"'
+        ' localSeverity="notice"/>',
+        False,
+    )
+
+
+def test_batch_queues_changes(set_config_modify, set_config_modify_many):
+    changes = []
+    cimc.set_ntp_server("10.0.0.1", batch=changes)
+    cimc.reboot(batch=changes)
+    set_config_modify.assert_not_called()
+    assert [dn for dn, _ in changes] == ["sys/svc-ext/ntp-svc", "sys/rack-unit-1"]
+
+    cimc.batch(*changes)
+    set_config_modify_many.assert_called_once_with(changes, False)
+
+
+def test_set_user_escapes_values(set_config_modify):
+    cimc.set_user(uid=11, username="admin", password="""p&ss'<w>"d""", priv="admin")
+    set_config_modify.assert_called_once_with(
+        "sys/user-ext/user-11",
+        '<aaaUser id="11" name="admin" priv="admin"'
+        ' pwd="p&amp;ss&apos;&lt;w&gt;&quot;d" dn="sys/user-ext/user-11"/>',
+        False,
+    )
+
+
+@pytest.mark.parametrize(
+    "func,args,kwargs,message",
+    [
+        (cimc.create_user, (), {}, "The user ID must be specified."),
+        (cimc.create_user, (11,), {"username": "a"}, "The password must be specified."),
+        (cimc.set_hostname, (), {}, "Hostname option must be provided."),
+        (cimc.set_syslog_server, (), {}, "The SYSLOG server must be specified."),
+        (cimc.tftp_update_bios, ("server",), {}, "The TFTP path must be specified."),
+    ],
+)
+def test_required_arguments(set_config_modify, func, args, kwargs, message):
+    with pytest.raises(CommandExecutionError, match=message):
+        func(*args, **kwargs)
+    set_config_modify.assert_not_called()
+
+
+def test_get_all(get_config_resolver_classes):
+    ret = cimc.get_all()
+    # The classes are queried with the hierarchical flag their getters use
+    assert ret["aaaUser"] == {"hierarchical": False}
+    assert ret["biosSettings"] == {"hierarchical": True}
+    assert ret["mgmtIf"] == {"hierarchical": True}
+    assert get_config_resolver_classes.call_count == 2
+
+    get_config_resolver_classes.reset_mock()
+    assert cimc.get_all("mgmtIf,aaaUser") == {
+        "mgmtIf": {"hierarchical": True},
+        "aaaUser": {"hierarchical": True},
+    }
+    get_config_resolver_classes.assert_called_once_with(["mgmtIf", "aaaUser"], True)
@@ -0,0 +1,89 @@
+"""
+Unit tests for the mattermost execution module
+"""
+
+import pytest
+
+import salt.modules.mattermost as mattermost
+from tests.support.mock import MagicMock, patch
+
+
+@pytest.fixture
+def config():
+    return {
+        "mattermost:hook": "peWcBiMOS9HrZG15peWcBiMOS9HrZG15",
+        "mattermost:api_url": "https://example.com",
+        "mattermost:channel": "town-square",
+        "mattermost:username": "salt",
+    }
+
+
+@pytest.fixture
+def config_get(config):
+    return MagicMock(side_effect=lambda key: config.get(key))
+
+
+@pytest.fixture
+def configure_loader_modules(config_get):
+    return {mattermost: {"__salt__": {"config.get": config_get}, "__context__": {}}}
+
+
+def test_post_message_caches_config(config_get):
+    query = MagicMock(return_value=True)
+    with patch("salt.utils.mattermost.query", query):
+        assert mattermost.post_message("first")
+        calls = config_get.call_count
+        assert mattermost.post_message("second")
+
+    assert config_get.call_count == calls
+    assert query.call_args.kwargs["api_url"] == "https://example.com"
+    assert query.call_args.kwargs["hook"] == "peWcBiMOS9HrZG15peWcBiMOS9HrZG15"
+
+
+def test_post_messages_single_request():
+    query = MagicMock(return_value=True)
+    with patch("salt.utils.mattermost.query", query):
+        assert mattermost.post_messages(["first", "second"])
+
+    query.assert_called_once()
+    assert query.call_args.kwargs["json"]["text"] == "```first\nsecond```"
+
+
+def test_post_messages_split():
+    query = MagicMock(return_value=True)
+    messages = ["x" * 10000, "y" * 10000]
+    with patch("salt.utils.mattermost.query", query):
+        assert mattermost.post_messages(messages)
+
+    assert [call.kwargs["json"]["text"] for call in query.call_args_list] == [
+        f"```{message}```" for message in messages
+    ]
+
+
+def test_post_messages_empty():
+    query = MagicMock(return_value=True)
+    with patch("salt.utils.mattermost.query", query):
+        assert mattermost.post_messages([]) is False
+    query.assert_not_called()
+
+
+def test_post_message_parameters():
+    query = MagicMock(return_value=True)
+    with patch("salt.utils.mattermost.query", query):
+        assert mattermost.post_message("default")
+        assert query.call_args.kwargs["json"] == {
+            "channel": "town-square",
+            "username": "salt",
+            "text": "```default```",
+        }
+
+        assert mattermost.post_message("override", channel="ops", username="bot")
+        assert query.call_args.kwargs["json"] == {
+            "channel": "ops",
+            "username": "bot",
+            "text": "```override```",
+        }
+
+        # The cached defaults are not modified by the override
+        assert mattermost.post_message("again")
+        assert query.call_args.kwargs["json"]["channel"] == "town-square"
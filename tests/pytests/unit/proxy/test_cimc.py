@@ -16,9 +16,9 @@ from tests.support.mock import MagicMock, patch
 log = logging.getLogger(__name__)
 
 
-def http_query_response(*args, data=None, **kwargs):
+def session_post_response(*args, data=None, **kwargs):
     log.debug(
-        "http_query_response side_effect; ARGS: %s // KWARGS: %s // DATA: %s",
+        "session_post_response side_effect; ARGS: %s // KWARGS: %s // DATA: %s",
         args,
         kwargs,
         data,
@@ -87,18 +87,59 @@ def http_query_response(*args, data=None, **kwargs):
         </outConfig>
     </configConfMo>
     """
+    config_con_mos_response = """\
+    <configConfMos
+        cookie="real-cookie"
+        response="yes">
+        <outConfigs>
+            <pair key="sys/svc-ext/syslog/client-primary">
+                <commSyslogClient
+                    dn="sys/svc-ext/syslog/client-primary"
+                    name="primary"
+                    status="modified">
+                </commSyslogClient>
+            </pair>
+            <pair key="sys/svc-ext/syslog/client-secondary">
+                <commSyslogClient
+                    dn="sys/svc-ext/syslog/client-secondary"
+                    name="secondary"
+                    status="modified">
+                </commSyslogClient>
+            </pair>
+        </outConfigs>
+    </configConfMos>
+    """
+
+    config_resolve_classes_response = """\
+    <configResolveClasses
+        cookie="real-cookie"
+        response="yes">
+        <outConfigs>
+            <mgmtIf
+                dn="sys/rack-unit-1/mgmt/if-1"
+                hostname="cimc-host">
+            </mgmtIf>
+            <aaaUser dn="sys/user-ext/user-1" id="1" name="admin"></aaaUser>
+            <aaaUser dn="sys/user-ext/user-2" id="2" name="ops"></aaaUser>
+        </outConfigs>
+    </configResolveClasses>
+    """
 
     if data.startswith("<aaaLogin"):
         response = login_response
     elif data.startswith("<aaaLogout"):
         response = logout_response
+    elif data.startswith("<configResolveClasses"):
+        response = config_resolve_classes_response
     elif data.startswith("<configResolveClass"):
         response = config_resolve_class_response
+    elif data.startswith("<configConfMos"):
+        response = config_con_mos_response
     elif data.startswith("<configConfMo"):
         response = config_con_mo_response
     else:
         response = ""
-    return {"text": response, "status": 200}
+    return MagicMock(text=response, status_code=200)
 
 
 @pytest.fixture
@@ -107,6 +148,9 @@ def configure_loader_modules():
         yield {cimc: {"__pillar__": {}}}
 
 
+CA_BUNDLE = "/etc/pki/tls/certs/ca-bundle.crt"
+
+
 @pytest.fixture(params=[None, True, False])
 def verify_ssl(request):
     return request.param
@@ -124,8 +168,30 @@ def opts(verify_ssl):
     }
 
 
+@pytest.fixture
+def session_mock():
+    session = MagicMock()
+    session.post.side_effect = session_post_response
+    with patch(
+        "salt.proxy.cimc.requests.Session", MagicMock(return_value=session)
+    ), patch("salt.utils.http.get_ca_bundle", MagicMock(return_value=CA_BUNDLE)):
+        yield session
+
+
+def _assert_session(session, verify_ssl):
+    expected_verify_ssl_value = _get_expected_verify_ssl(verify_ssl)
+    assert session.verify == expected_verify_ssl_value
+    assert session.post.mock_calls
+    for call in session.post.mock_calls:
+        assert call.args == ("https://TheHost/nuova",)
+        assert call.kwargs["timeout"] == 60
+
+
 def _get_expected_verify_ssl(verify_ssl):
     expected = True if verify_ssl is None else verify_ssl
+    if expected:
+        # Certificates are verified against the configured CA bundle
+        expected = CA_BUNDLE
 
     log.debug(
         "verify_ssl: %s // expected verify_ssl: %s",
@@ -178,25 +244,13 @@ def test__validate_response_code():
             mock_logout.assert_called_once_with("9zVG5U8DFZNsTR")
 
 
-def test_init_with_ssl(verify_ssl, opts):
-    http_query_mock = MagicMock(side_effect=http_query_response)
-    expected_verify_ssl_value = _get_expected_verify_ssl(verify_ssl)
+def test_init_with_ssl(verify_ssl, opts, session_mock):
+    cimc.init(opts)
 
-    with patch.dict(cimc.__utils__, {"http.query": http_query_mock}):
-        cimc.init(opts)
+    _assert_session(session_mock, verify_ssl)
 
-    for idx, call in enumerate(http_query_mock.mock_calls, 1):
-        condition = call.kwargs["verify_ssl"] is expected_verify_ssl_value
-        condition_error = "{} != {}; Call(number={}): {}".format(
-            idx, call, call.kwargs["verify_ssl"], expected_verify_ssl_value
-        )
-        assert condition, condition_error
-
-
-def test_logon(opts, verify_ssl):
-    http_query_mock = MagicMock(side_effect=http_query_response)
-    expected_verify_ssl_value = _get_expected_verify_ssl(verify_ssl)
 
+def test_logon(opts, verify_ssl, session_mock):
     # Let's init the proxy and ignore it's actions, this test is not about them
     with patch(
         "salt.proxy.cimc.get_config_resolver_class",
@@ -204,21 +258,12 @@ def test_logon(opts, verify_ssl):
     ):
         cimc.init(opts)
 
-    with patch.dict(cimc.__utils__, {"http.query": http_query_mock}):
-        cimc.logon()
+    cimc.logon()
 
-    for idx, call in enumerate(http_query_mock.mock_calls, 1):
-        condition = call.kwargs["verify_ssl"] is expected_verify_ssl_value
-        condition_error = "{} != {}; Call(number={}): {}".format(
-            idx, call, call.kwargs["verify_ssl"], expected_verify_ssl_value
-        )
-        assert condition, condition_error
+    _assert_session(session_mock, verify_ssl)
 
 
-def test_logout(opts, verify_ssl):
-    http_query_mock = MagicMock(side_effect=http_query_response)
-    expected_verify_ssl_value = _get_expected_verify_ssl(verify_ssl)
-
+def test_logout(opts, verify_ssl, session_mock):
     # Let's init the proxy and ignore it's actions, this test is not about them
     with patch(
         "salt.proxy.cimc.get_config_resolver_class",
@@ -226,21 +271,12 @@ def test_logout(opts, verify_ssl):
     ):
         cimc.init(opts)
 
-    with patch.dict(cimc.__utils__, {"http.query": http_query_mock}):
-        cimc.logout()
+    cimc.logout()
 
-    for idx, call in enumerate(http_query_mock.mock_calls, 1):
-        condition = call.kwargs["verify_ssl"] is expected_verify_ssl_value
-        condition_error = "{} != {}; Call(number={}): {}".format(
-            idx, call, call.kwargs["verify_ssl"], expected_verify_ssl_value
-        )
-        assert condition, condition_error
+    _assert_session(session_mock, verify_ssl)
 
 
-def test_grains(opts, verify_ssl):
-    http_query_mock = MagicMock(side_effect=http_query_response)
-    expected_verify_ssl_value = _get_expected_verify_ssl(verify_ssl)
-
+def test_grains(opts, verify_ssl, session_mock):
     # Let's init the proxy and ignore it's actions, this test is not about them
     with patch(
         "salt.proxy.cimc.get_config_resolver_class",
@@ -248,21 +284,12 @@ def test_grains(opts, verify_ssl):
     ):
         cimc.init(opts)
 
-    with patch.dict(cimc.__utils__, {"http.query": http_query_mock}):
-        cimc.grains()
-
-    for idx, call in enumerate(http_query_mock.mock_calls, 1):
-        condition = call.kwargs["verify_ssl"] is expected_verify_ssl_value
-        condition_error = "{} != {}; Call(number={}): {}".format(
-            idx, call, call.kwargs["verify_ssl"], expected_verify_ssl_value
-        )
-        assert condition, condition_error
+    cimc.grains()
 
+    _assert_session(session_mock, verify_ssl)
 
-def test_grains_refresh(opts, verify_ssl):
-    http_query_mock = MagicMock(side_effect=http_query_response)
-    expected_verify_ssl_value = _get_expected_verify_ssl(verify_ssl)
 
+def test_grains_refresh(opts, verify_ssl, session_mock):
     # Let's init the proxy and ignore it's actions, this test is not about them
     with patch(
         "salt.proxy.cimc.get_config_resolver_class",
@@ -270,21 +297,12 @@ def test_grains_refresh(opts, verify_ssl):
     ):
         cimc.init(opts)
 
-    with patch.dict(cimc.__utils__, {"http.query": http_query_mock}):
-        cimc.grains_refresh()
-
-    for idx, call in enumerate(http_query_mock.mock_calls, 1):
-        condition = call.kwargs["verify_ssl"] is expected_verify_ssl_value
-        condition_error = "{} != {}; Call(number={}): {}".format(
-            idx, call, call.kwargs["verify_ssl"], expected_verify_ssl_value
-        )
-        assert condition, condition_error
+    cimc.grains_refresh()
 
+    _assert_session(session_mock, verify_ssl)
 
-def test_ping(opts, verify_ssl):
-    http_query_mock = MagicMock(side_effect=http_query_response)
-    expected_verify_ssl_value = _get_expected_verify_ssl(verify_ssl)
 
+def test_ping(opts, verify_ssl, session_mock):
     # Let's init the proxy and ignore it's actions, this test is not about them
     with patch(
         "salt.proxy.cimc.get_config_resolver_class",
@@ -292,21 +310,12 @@ def test_ping(opts, verify_ssl):
     ):
         cimc.init(opts)
 
-    with patch.dict(cimc.__utils__, {"http.query": http_query_mock}):
-        cimc.ping()
-
-    for idx, call in enumerate(http_query_mock.mock_calls, 1):
-        condition = call.kwargs["verify_ssl"] is expected_verify_ssl_value
-        condition_error = "{} != {}; Call(number={}): {}".format(
-            idx, call, call.kwargs["verify_ssl"], expected_verify_ssl_value
-        )
-        assert condition, condition_error
+    cimc.ping()
 
+    _assert_session(session_mock, verify_ssl)
 
-def test_set_config_modify(opts, verify_ssl):
-    http_query_mock = MagicMock(side_effect=http_query_response)
-    expected_verify_ssl_value = _get_expected_verify_ssl(verify_ssl)
 
+def test_set_config_modify(opts, verify_ssl, session_mock):
     # Let's init the proxy and ignore it's actions, this test is not about them
     with patch(
         "salt.proxy.cimc.get_config_resolver_class",
@@ -314,18 +323,236 @@ def test_set_config_modify(opts, verify_ssl):
     ):
         cimc.init(opts)
 
-    with patch.dict(cimc.__utils__, {"http.query": http_query_mock}):
-        cimc.set_config_modify(
-            dn="sys/rack-unit-1/locator-led",
-            inconfig=(
-                "<inConfig><equipmentLocatorLed adminState='on'"
-                " dn='sys/rack-unit-1/locator-led'></equipmentLocatorLed></inConfig>"
+    cimc.set_config_modify(
+        dn="sys/rack-unit-1/locator-led",
+        inconfig=(
+            "<inConfig><equipmentLocatorLed adminState='on'"
+            " dn='sys/rack-unit-1/locator-led'></equipmentLocatorLed></inConfig>"
+        ),
+    )
+
+    _assert_session(session_mock, verify_ssl)
+
+
+def test_session_reused(opts, session_mock):
+    cimc.init(opts)
+    cimc.get_config_resolver_class("computeRackUnit")
+    cimc.ping()
+
+    assert cimc.DETAILS["session"] is session_mock
+    assert cimc.requests.Session.call_count == 1
+
+
+def test_session_not_shared_with_forked_process(opts, session_mock):
+    cimc.init(opts)
+    parent_session = cimc.DETAILS["session"]
+    parent_calls = parent_session.post.call_count
+
+    child_session = MagicMock()
+    child_session.post.side_effect = session_post_response
+    with patch("os.getpid", MagicMock(return_value=-1)), patch(
+        "salt.proxy.cimc.requests.Session", MagicMock(return_value=child_session)
+    ):
+        cimc.ping()
+        assert cimc.DETAILS["session"] is child_session
+        assert cimc.DETAILS["session_pid"] == -1
+
+    # The inherited session belongs to the parent, it must not be closed
+    parent_session.close.assert_not_called()
+    assert (
+        not parent_session.post.call_args_list[-1]
+        .kwargs["data"]
+        .startswith("<aaaLogin")
+    )
+    assert child_session.post.call_count == 2
+
+
+def test_shutdown_closes_session(opts, session_mock):
+    cimc.init(opts)
+    assert cimc.DETAILS["session"] is session_mock
+
+    cimc.shutdown()
+    session_mock.close.assert_called_once_with()
+    assert "session" not in cimc.DETAILS
+
+
+def test_set_config_modify_many(opts, session_mock):
+    cimc.init(opts)
+    session_mock.post.reset_mock()
+
+    ret = cimc.set_config_modify_many(
+        [
+            (
+                "sys/svc-ext/syslog/client-primary",
+                "<commSyslogClient name='primary' hostname='10.0.0.1'/>",
             ),
-        )
-
-    for idx, call in enumerate(http_query_mock.mock_calls, 1):
-        condition = call.kwargs["verify_ssl"] is expected_verify_ssl_value
-        condition_error = "{} != {}; Call(number={}): {}".format(
-            idx, call, call.kwargs["verify_ssl"], expected_verify_ssl_value
-        )
-        assert condition, condition_error
+            (
+                "sys/svc-ext/syslog/client-secondary",
+                "<commSyslogClient name='secondary' hostname='10.0.0.2'/>",
+            ),
+        ]
+    )
+
+    payloads = [call.kwargs["data"] for call in session_mock.post.mock_calls]
+    config_payloads = [p for p in payloads if p.startswith("<configConfMos")]
+    assert len(config_payloads) == 1
+    assert config_payloads[0] == (
+        '<configConfMos cookie="real-cookie" inHierarchical="false"><inConfigs>'
+        '<pair key="sys/svc-ext/syslog/client-primary">'
+        "<commSyslogClient name='primary' hostname='10.0.0.1'/></pair>"
+        '<pair key="sys/svc-ext/syslog/client-secondary">'
+        "<commSyslogClient name='secondary' hostname='10.0.0.2'/></pair>"
+        "</inConfigs></configConfMos>"
+    )
+    pairs = ret["outConfigs"]["pair"]
+    assert [pair["key"] for pair in pairs] == [
+        "sys/svc-ext/syslog/client-primary",
+        "sys/svc-ext/syslog/client-secondary",
+    ]
+    assert pairs[0]["commSyslogClient"][0]["status"] == "modified"
+
+
+def test_get_config_resolver_classes(opts, session_mock):
+    cimc.init(opts)
+    session_mock.post.reset_mock()
+
+    ret = cimc.get_config_resolver_classes(["mgmtIf", "aaaUser", "commSnmp"], True)
+
+    payloads = [call.kwargs["data"] for call in session_mock.post.mock_calls]
+    resolve_payloads = [p for p in payloads if p.startswith("<configResolve")]
+    assert resolve_payloads == [
+        '<configResolveClasses cookie="real-cookie" inHierarchical="true"><inIds>'
+        '<Id value="mgmtIf"/><Id value="aaaUser"/><Id value="commSnmp"/>'
+        "</inIds></configResolveClasses>"
+    ]
+    assert ret["mgmtIf"]["outConfigs"]["mgmtIf"][0]["hostname"] == "cimc-host"
+    assert [user["name"] for user in ret["aaaUser"]["outConfigs"]["aaaUser"]] == [
+        "admin",
+        "ops",
+    ]
+    assert ret["commSnmp"] == {"outConfigs": {}}
+
+
+def test_get_config_resolver_classes_error(opts, session_mock):
+    cimc.init(opts)
+    error_response = """\
+    <configResolveClasses
+        cookie="real-cookie"
+        response="yes"
+        errorCode="552"
+        invocationResult="unidentified-fail"
+        errorDescr="Authorization required">
+    </configResolveClasses>
+    """
+
+    def post(*args, data=None, **kwargs):
+        if data.startswith("<configResolveClasses"):
+            return MagicMock(text=error_response, status_code=200)
+        return session_post_response(*args, data=data, **kwargs)
+
+    session_mock.post.side_effect = post
+    with pytest.raises(
+        salt.exceptions.CommandExecutionError, match="Authorization required"
+    ):
+        cimc.get_config_resolver_classes(["mgmtIf", "aaaUser"])
+
+    # Nothing was cached, the next query goes to the device
+    session_mock.post.side_effect = session_post_response
+    cimc.get_config_resolver_class("mgmtIf", False)
+    assert len(_resolve_class_calls(session_mock)) == 2
+
+
+def _resolve_class_calls(session):
+    return [
+        call
+        for call in session.post.mock_calls
+        if call.kwargs["data"].startswith("<configResolveClass ")
+    ]
+
+
+def test_get_config_resolver_class_cached(opts, session_mock):
+    # init() queries computeRackUnit to check connectivity
+    cimc.init(opts)
+    assert len(_resolve_class_calls(session_mock)) == 1
+
+    first = cimc.get_config_resolver_class("computeRackUnit", False)
+    second = cimc.get_config_resolver_class("computeRackUnit", False)
+    assert first == second
+    assert len(_resolve_class_calls(session_mock)) == 1
+
+    # A different hierarchy flag is a different query
+    cimc.get_config_resolver_class("computeRackUnit", True)
+    assert len(_resolve_class_calls(session_mock)) == 2
+
+    # Configuration changes invalidate the cache
+    cimc.set_config_modify(dn="sys/rack-unit-1/locator-led", inconfig="")
+    cimc.get_config_resolver_class("computeRackUnit", False)
+    assert len(_resolve_class_calls(session_mock)) == 3
+
+
+def test_get_config_resolver_class_cache_copies(opts, session_mock):
+    cimc.init(opts)
+    first = cimc.get_config_resolver_class("computeRackUnit", False)
+    first["outConfig"].clear()
+
+    # Modifying a result does not change the cached value
+    second = cimc.get_config_resolver_class("computeRackUnit", False)
+    assert second["outConfig"]
+    assert len(_resolve_class_calls(session_mock)) == 1
+
+
+def test_get_config_resolver_class_error_not_cached(opts, session_mock):
+    cimc.init(opts)
+    error_response = """\
+    <configResolveClass
+        cookie="real-cookie"
+        response="yes"
+        errorCode="103"
+        invocationResult="unidentified-fail"
+        errorDescr="can't resolve to class commSnmp">
+    </configResolveClass>
+    """
+
+    def post(*args, data=None, **kwargs):
+        if data.startswith("<configResolveClass "):
+            return MagicMock(text=error_response, status_code=200)
+        return session_post_response(*args, data=data, **kwargs)
+
+    session_mock.post.side_effect = post
+    assert cimc.get_config_resolver_class("commSnmp", False) == {}
+    assert len(_resolve_class_calls(session_mock)) == 2
+
+    # The error reply was not cached, the device is queried again
+    session_mock.post.side_effect = session_post_response
+    ret = cimc.get_config_resolver_class("commSnmp", False)
+    assert ret["outConfig"]
+    assert len(_resolve_class_calls(session_mock)) == 3
+
+
+def test_get_config_resolver_class_cache_expires(opts, session_mock):
+    with patch("time.monotonic", MagicMock(return_value=100)):
+        cimc.init(opts)
+        cimc.get_config_resolver_class("computeRackUnit", False)
+    assert len(_resolve_class_calls(session_mock)) == 1
+
+    with patch("time.monotonic", MagicMock(return_value=106)):
+        cimc.get_config_resolver_class("computeRackUnit", False)
+    assert len(_resolve_class_calls(session_mock)) == 2
+
+
+def test_get_config_resolver_class_cache_disabled(opts, session_mock):
+    opts["proxy"]["cache_ttl"] = 0
+    cimc.init(opts)
+    cimc.get_config_resolver_class("computeRackUnit", False)
+    cimc.get_config_resolver_class("computeRackUnit", False)
+    assert len(_resolve_class_calls(session_mock)) == 3
+
+
+def test_session_uses_proxy_settings(opts, session_mock):
+    proxy_opts = {"proxy_host": "squid", "proxy_port": 3128}
+    with patch.dict(cimc.__opts__, proxy_opts):
+        cimc.init(opts)
+    assert session_mock.proxies == {
+        "http": "http://squid:3128",
+        "https": "http://squid:3128",
+    }
@@ -0,0 +1,80 @@
+"""
+Unit tests for the mattermost returner
+"""
+
+import pytest
+
+import salt.returners.mattermost_returner as mattermost
+import salt.utils.mattermost
+from tests.support.mock import MagicMock, patch
+
+
+@pytest.fixture
+def configure_loader_modules():
+    return {mattermost: {"__opts__": {}, "__salt__": {}}}
+
+
+@pytest.fixture
+def options():
+    with patch.object(
+        mattermost,
+        "_get_options",
+        MagicMock(
+            return_value={
+                "api_url": "https://example.com",
+                "hook": "peWcBiMOS9HrZG15peWcBiMOS9HrZG15",
+                "channel": "town-square",
+                "username": "salt",
+            }
+        ),
+    ):
+        yield
+
+
+def _event(tag, **data):
+    return {"tag": tag, "data": data}
+
+
+def test_event_return_single_post(options):
+    query = MagicMock(return_value=True)
+    events = [_event("salt/job/1", id="minion1"), _event("salt/job/2", id="minion2")]
+    with patch("salt.utils.mattermost.query", query):
+        assert mattermost.event_return(events) is True
+
+    query.assert_called_once()
+    assert query.call_args.kwargs["json"] == {
+        "channel": "town-square",
+        "username": "salt",
+        "text": (
+            "```tag: salt/job/1\r\nid: minion1\r\n"
+            "\ntag: salt/job/2\r\nid: minion2\r\n```"
+        ),
+    }
+
+
+def test_event_return_split(options):
+    query = MagicMock(return_value=True)
+    events = [_event(f"salt/job/{i}", data="x" * 6000) for i in range(5)]
+    with patch("salt.utils.mattermost.query", query):
+        assert mattermost.event_return(events) is True
+
+    texts = [call.kwargs["json"]["text"] for call in query.call_args_list]
+    # Two events fit in each post
+    assert len(texts) == 3
+    assert all(len(text) <= salt.utils.mattermost.MAX_POST_SIZE for text in texts)
+    assert sum(text.count("tag: ") for text in texts) == 5
+
+
+def test_event_return_failure(options):
+    query = MagicMock(side_effect=[False, True])
+    events = [_event(f"salt/job/{i}", data="x" * 10000) for i in range(2)]
+    with patch("salt.utils.mattermost.query", query):
+        assert mattermost.event_return(events) is False
+    assert query.call_count == 2
+
+
+def test_event_return_no_events(options):
+    query = MagicMock(return_value=True)
+    with patch("salt.utils.mattermost.query", query):
+        assert mattermost.event_return([]) is True
+    query.assert_not_called()
@@ -28,16 +28,34 @@ def configure_loader_modules():
     return {asam: {"__opts__": opts}}
 
 
-def test_add_platform():
-    parse_html_content = MagicMock()
-    get_platform_set_name = MagicMock(return_value="plat-foo")
-    requests_mock = MagicMock()
+@pytest.fixture
+def requests_mock():
+    with patch("salt.runners.asam._parse_html_content", MagicMock()), patch(
+        "salt.runners.asam._SESSION.post", MagicMock()
+    ) as post:
+        yield post
+
+
+@pytest.fixture
+def platformset_name():
+    with patch(
+        "salt.runners.asam._get_platformset_name", MagicMock(return_value="plat-foo")
+    ):
+        yield
+
 
-    # remove_platform
-    with patch("salt.runners.asam._parse_html_content", parse_html_content), patch(
-        "salt.runners.asam._get_platformset_name", get_platform_set_name
-    ), patch("salt.runners.asam.requests.post", requests_mock):
-        asam.add_platform("plat-foo-2", "plat-foo", "prov1.domain.com")
+@pytest.fixture
+def platforms():
+    with patch(
+        "salt.runners.asam._get_platforms",
+        MagicMock(return_value=["plat-foo", "plat-bar"]),
+    ):
+        yield
+
+
+@pytest.mark.usefixtures("platformset_name")
+def test_add_platform(requests_mock):
+    asam.add_platform("plat-foo-2", "plat-foo", "prov1.domain.com")
 
     requests_mock.assert_called_with(
         "https://prov1.domain.com:3451/config/PlatformSetConfig.html",
@@ -48,16 +66,9 @@ def test_add_platform():
     )
 
 
-def test_remove_platform():
-    parse_html_content = MagicMock()
-    get_platform_set_name = MagicMock(return_value="plat-foo")
-    requests_mock = MagicMock()
-
-    # remove_platform
-    with patch("salt.runners.asam._parse_html_content", parse_html_content), patch(
-        "salt.runners.asam._get_platformset_name", get_platform_set_name
-    ), patch("salt.runners.asam.requests.post", requests_mock):
-        asam.remove_platform("plat-foo", "prov1.domain.com")
+@pytest.mark.usefixtures("platformset_name")
+def test_remove_platform(requests_mock):
+    asam.remove_platform("plat-foo", "prov1.domain.com")
 
     requests_mock.assert_called_with(
         "https://prov1.domain.com:3451/config/PlatformConfig.html",
@@ -74,16 +85,9 @@ def test_remove_platform():
     )
 
 
-def test_list_platforms():
-    parse_html_content = MagicMock()
-    get_platforms = MagicMock(return_value=["plat-foo", "plat-bar"])
-    requests_mock = MagicMock()
-
-    # remove_platform
-    with patch("salt.runners.asam._parse_html_content", parse_html_content), patch(
-        "salt.runners.asam._get_platforms", get_platforms
-    ), patch("salt.runners.asam.requests.post", requests_mock):
-        asam.list_platforms("prov1.domain.com")
+@pytest.mark.usefixtures("platforms")
+def test_list_platforms(requests_mock):
+    asam.list_platforms("prov1.domain.com")
 
     requests_mock.assert_called_with(
         "https://prov1.domain.com:3451/config/PlatformConfig.html",
@@ -94,16 +98,9 @@ def test_list_platforms():
     )
 
 
-def test_list_platform_sets():
-    parse_html_content = MagicMock()
-    get_platform_sets = MagicMock(return_value=["plat-foo", "plat-bar"])
-    requests_mock = MagicMock()
-
-    # remove_platform
-    with patch("salt.runners.asam._parse_html_content", parse_html_content), patch(
-        "salt.runners.asam._get_platforms", get_platform_sets
-    ), patch("salt.runners.asam.requests.post", requests_mock):
-        asam.list_platform_sets("prov1.domain.com")
+@pytest.mark.usefixtures("platforms")
+def test_list_platform_sets(requests_mock):
+    asam.list_platform_sets("prov1.domain.com")
 
     requests_mock.assert_called_with(
         "https://prov1.domain.com:3451/config/PlatformSetConfig.html",
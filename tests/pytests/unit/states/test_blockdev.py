@@ -3,17 +3,51 @@
 """
 
 import os
+import stat
 
 import pytest
 
 import salt.states.blockdev as blockdev
 import salt.utils.path
+from salt.exceptions import CommandExecutionError
 from tests.support.mock import MagicMock, Mock, patch
 
 
 @pytest.fixture
 def configure_loader_modules():
-    return {blockdev: {}}
+    # Run blkid through cmd.run so that it can be mocked
+    return {blockdev: {"__opts__": {"blockdev_use_cmdrun": True}}}
+
+
+@pytest.fixture(autouse=True)
+def no_libblkid():
+    # Make _checkblk fall back to the blkid command
+    with patch("salt.utils.blkid.fstype", MagicMock(return_value=None)):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def no_batcher():
+    # Make _checkblk and tuned fall back to the per-device commands
+    batcher = MagicMock()
+    batcher.fstype.return_value = None
+    batcher.dump.return_value = None
+    with patch.object(blockdev, "_batcher", MagicMock(return_value=batcher)):
+        yield batcher
+
+
+@pytest.fixture
+def os_stat():
+    st = MagicMock(st_mode=stat.S_IFBLK | 0o660)
+    with patch.object(os, "stat", MagicMock(return_value=st)) as mock:
+        yield mock
+
+
+@pytest.fixture(autouse=True)
+def reset_mkfs_cache():
+    blockdev._reset_mkfs_cache()
+    yield
+    blockdev._reset_mkfs_cache()
 
 
 def test_tuned():
@@ -25,18 +59,87 @@ def test_tuned():
     ret = {"name": name, "result": True, "changes": {}, "comment": ""}
 
     comt = ("Changes to {} cannot be applied. Not a block device. ").format(name)
-    with patch.dict(blockdev.__salt__, {"file.is_blkdev": False}):
-        ret.update({"comment": comt})
+    is_blkdev = MagicMock(return_value=False)
+    dump = MagicMock()
+    with patch.dict(
+        blockdev.__salt__, {"file.is_blkdev": is_blkdev, "disk.dump": dump}
+    ):
+        ret.update({"comment": comt, "result": False})
         assert blockdev.tuned(name) == ret
+        is_blkdev.assert_called_once_with(name)
+        dump.assert_not_called()
 
     comt = f"Changes to {name} will be applied "
-    with patch.dict(blockdev.__salt__, {"file.is_blkdev": True}):
+    with patch.dict(
+        blockdev.__salt__, {"file.is_blkdev": MagicMock(return_value=True)}
+    ):
         ret.update({"comment": comt, "result": None})
         with patch.dict(blockdev.__opts__, {"test": True}):
             assert blockdev.tuned(name) == ret
 
 
-def test_formatted():
+def test_tuned_only_applies_differences():
+    """
+    Test that disk.tune is only called for the options which differ from
+    the current state of the block device
+    """
+    name = "/dev/vg/master-data"
+    current = {"getro": "0", "getra": "256", "getfra": "256"}
+    dump = MagicMock(return_value=current)
+    tune = MagicMock(return_value={"getra": "1024"})
+    with patch.dict(
+        blockdev.__salt__,
+        {
+            "file.is_blkdev": MagicMock(return_value=True),
+            "disk.dump": dump,
+            "disk.tune": tune,
+        },
+    ), patch.dict(blockdev.__opts__, {"test": False}):
+        # Already in the requested state, nothing is tuned
+        ret = blockdev.tuned(
+            name, **{"read-ahead": 256, "read-only": False, "read-write": True}
+        )
+        assert ret["comment"] == f"Block device {name} already in correct state"
+        assert ret["changes"] == {}
+        tune.assert_not_called()
+
+        # Only the differing option is tuned
+        ret = blockdev.tuned(name, **{"read-ahead": 1024, "read-write": True})
+        assert ret["comment"] == f"Block device {name} successfully modified "
+        assert ret["changes"] == {"read-ahead": "Changed from 256 to 1024"}
+        tune.assert_called_once_with(name, **{"read-ahead": 1024})
+
+
+def test_tuned_batched_dump(no_batcher):
+    """
+    Test that tuned uses the batched lsblk probe instead of disk.dump
+    """
+    name = "/dev/vg/master-data"
+    no_batcher.dump.return_value = {"getro": "0", "getra": "256"}
+    dump = MagicMock()
+    tune = MagicMock()
+    with patch.dict(
+        blockdev.__salt__,
+        {
+            "file.is_blkdev": MagicMock(return_value=True),
+            "disk.dump": dump,
+            "disk.tune": tune,
+        },
+    ), patch.dict(blockdev.__opts__, {"test": False}):
+        ret = blockdev.tuned(name, **{"read-ahead": 256, "read-only": False})
+        assert ret["comment"] == f"Block device {name} already in correct state"
+        dump.assert_not_called()
+        tune.assert_not_called()
+        # The devices are probed again for every state
+        no_batcher.invalidate.assert_called_once_with()
+
+        # getfra is not reported by lsblk
+        dump.return_value = {"getro": "0", "getra": "256", "getfra": "256"}
+        blockdev.tuned(name, **{"filesystem-read-ahead": 256})
+        dump.assert_called_once_with(name)
+
+
+def test_formatted(os_stat):
     """
     Test to manage filesystems of partitions.
     """
@@ -44,8 +147,9 @@ def test_formatted():
 
     ret = {"name": name, "result": False, "changes": {}, "comment": ""}
 
+    st = os_stat.return_value
     with patch.object(
-        os.path, "exists", MagicMock(side_effect=[False, True, True, True, True])
+        os, "stat", MagicMock(side_effect=[FileNotFoundError, st, st, st, st])
     ):
         comt = f"{name} does not exist"
         ret.update({"comment": comt})
@@ -101,3 +205,294 @@ def test__checkblk():
     cmd_mock.assert_called_once_with(
         ["blkid", "-o", "value", "-s", "TYPE", "/dev/foo"], ignore_retcode=True
     )
+
+
+def test_formatted_poll_backoff(os_stat):
+    """
+    Test that the fstype is re-checked with an exponential backoff after
+    formatting the block device.
+    """
+    name = "/dev/vg/master-data"
+    checkblk = MagicMock(side_effect=["", "", "", "ext4"])
+    sleep = MagicMock()
+    with patch.object(blockdev, "_checkblk", checkblk), patch.object(
+        salt.utils.path, "which", MagicMock(return_value=True)
+    ), patch("time.sleep", sleep), patch.dict(
+        blockdev.__salt__, {"disk.format": MagicMock(return_value=True)}
+    ), patch.dict(
+        blockdev.__opts__, {"test": False}
+    ):
+        ret = blockdev.formatted(name)
+
+    assert ret["result"] is True
+    assert ret["comment"] == f"{name} has been formatted with ext4"
+    assert [call.args[0] for call in sleep.call_args_list] == pytest.approx(
+        [0.05, 0.065]
+    )
+
+
+def test_formatted_poll_timeout(os_stat):
+    """
+    Test that the fstype check gives up once poll_timeout is exceeded.
+    """
+    name = "/dev/vg/master-data"
+    sleep = MagicMock()
+    with patch.object(blockdev, "_checkblk", MagicMock(return_value="")), patch.object(
+        salt.utils.path, "which", MagicMock(return_value=True)
+    ), patch("time.sleep", sleep), patch(
+        "time.monotonic", MagicMock(side_effect=[0, 0.5, 1.0, 2.5])
+    ), patch.dict(
+        blockdev.__salt__, {"disk.format": MagicMock(return_value=True)}
+    ), patch.dict(
+        blockdev.__opts__, {"test": False}
+    ):
+        ret = blockdev.formatted(name, poll_timeout=2)
+
+    assert ret["result"] is False
+    assert ret["comment"] == f"Failed to format {name}"
+    assert sleep.call_count == 2
+
+
+def test_formatted_not_blkdev(os_stat):
+    """
+    Test that formatted fails fast when the target is not a block device,
+    unless force is set.
+    """
+    name = "/srv/disk.img"
+    os_stat.return_value.st_mode = stat.S_IFREG | 0o644
+    checkblk = MagicMock(return_value="ext4")
+    with patch.object(blockdev, "_checkblk", checkblk):
+        ret = blockdev.formatted(name)
+        assert ret["result"] is False
+        assert ret["comment"] == f"{name} is not a block device"
+        checkblk.assert_not_called()
+
+        ret = blockdev.formatted(name, force=True)
+        assert ret["result"] is True
+        checkblk.assert_called_once_with(name)
+
+        # An empty image file is not probed
+        os_stat.return_value.st_size = 0
+        with patch.dict(blockdev.__opts__, {"test": True}), patch.object(
+            salt.utils.path, "which", MagicMock(return_value=True)
+        ):
+            ret = blockdev.formatted(name, force=True)
+        assert ret["result"] is None
+        checkblk.assert_called_once_with(name)
+
+        os_stat.side_effect = PermissionError("Permission denied")
+        ret = blockdev.formatted(name)
+        assert ret["result"] is False
+        assert ret["comment"] == f"Unable to stat {name}: Permission denied"
+
+
+def test__mkfs_path():
+    """
+    Test that mkfs binaries found on the PATH are looked up only once
+    """
+    which = MagicMock(side_effect=[None, "/sbin/mkfs.xfs"])
+    with patch.object(salt.utils.path, "which", which):
+        # Missing binaries are not cached
+        assert blockdev._mkfs_path("xfs") is None
+        assert blockdev._mkfs_path("xfs") == "/sbin/mkfs.xfs"
+        assert blockdev._mkfs_path("xfs") == "/sbin/mkfs.xfs"
+    assert which.call_count == 2
+
+
+def test__checkblk_subprocess():
+    """
+    Confirm that blkid is run directly unless blockdev_use_cmdrun is set
+    """
+    cmd_mock = Mock()
+    proc = MagicMock(stdout=b"xfs\n")
+    with patch.dict(blockdev.__salt__, {"cmd.run": cmd_mock}), patch.dict(
+        blockdev.__opts__, {"blockdev_use_cmdrun": False}
+    ), patch("subprocess.run", MagicMock(return_value=proc)) as run_mock:
+        assert blockdev._checkblk("/dev/foo") == "xfs"
+        run_mock.assert_called_once()
+        assert run_mock.call_args.args[0] == [
+            "blkid",
+            "-o",
+            "value",
+            "-s",
+            "TYPE",
+            "/dev/foo",
+        ]
+        assert run_mock.call_args.kwargs["env"]["LC_ALL"] == "C"
+
+        run_mock.side_effect = FileNotFoundError
+        assert blockdev._checkblk("/dev/foo") == ""
+    cmd_mock.assert_not_called()
+
+
+def test__checkblk_libblkid():
+    """
+    Confirm that libblkid is used instead of cmd.run when available
+    """
+    cmd_mock = Mock()
+    with patch.dict(blockdev.__salt__, {"cmd.run": cmd_mock}), patch(
+        "salt.utils.blkid.fstype", MagicMock(return_value="xfs")
+    ):
+        assert blockdev._checkblk("/dev/foo") == "xfs"
+    cmd_mock.assert_not_called()
+
+
+def test__checkblk_ignores_lsblk(no_batcher):
+    """
+    Confirm that the filesystem reported by lsblk is not trusted, it may be
+    stale after an earlier state wiped the device
+    """
+    no_batcher.fstype.return_value = "ext4"
+    with patch("salt.utils.blkid.fstype", MagicMock(return_value="")):
+        assert blockdev._checkblk("/dev/foo") == ""
+    with patch("salt.utils.blkid.fstype", MagicMock(return_value="xfs")):
+        assert blockdev._checkblk("/dev/foo") == "xfs"
+    no_batcher.fstype.assert_not_called()
+
+
+def test_mod_aggregate():
+    """
+    Test that mod_aggregate groups the devices of the pending tuned states
+    and that the group is tuned once the triggering state runs.
+    """
+    chunks = [
+        {"state": "blockdev", "fun": "tuned", "name": "/dev/sda", "read-ahead": 512},
+        {"state": "blockdev", "fun": "tuned", "name": "/dev/sdb", "read-only": True},
+        {
+            "state": "blockdev",
+            "fun": "tuned",
+            "name": "/dev/sdc",
+            "read-only": True,
+            "require": [{"cmd": "foo"}],
+        },
+        {"state": "blockdev", "fun": "tuned", "name": "/dev/sdd", "onlyif": "true"},
+        {"state": "blockdev", "fun": "formatted", "name": "/dev/sde"},
+        {"state": "pkg", "fun": "installed", "name": "/dev/sdf"},
+    ]
+    # state.py flags the low chunk before calling the hook
+    low = chunks[0]
+    low["__agg__"] = True
+    dump = MagicMock(return_value={"getro": "1", "getra": "256", "getfra": "256"})
+    tune = MagicMock(return_value={"getro": "1", "getra": "512", "getfra": "256"})
+    gen_tag = MagicMock(side_effect=lambda chunk: chunk["name"])
+    with patch.dict(
+        blockdev.__salt__,
+        {
+            "file.is_blkdev": MagicMock(return_value=True),
+            "disk.dump": dump,
+            "disk.tune": tune,
+        },
+    ), patch.dict(blockdev.__utils__, {"state.gen_tag": gen_tag}), patch.dict(
+        blockdev.__opts__, {"test": False, "blockdev_parallel": True}
+    ), patch.dict(
+        blockdev.__context__, {}
+    ):
+        assert blockdev.mod_aggregate(low, chunks, {}) is low
+        assert [chunk.get("__agg__") for chunk in chunks] == [
+            True,
+            True,
+            None,
+            None,
+            None,
+            None,
+        ]
+        # Nothing is touched before the requisites of the state are checked
+        dump.assert_not_called()
+        tune.assert_not_called()
+
+        ret = blockdev.tuned("/dev/sda", **{"read-ahead": 512})
+        assert ret["changes"] == {"read-ahead": "Changed from 256 to 512"}
+        assert dump.call_count == 2
+        tune.assert_called_once_with("/dev/sda", **{"read-ahead": 512})
+
+        ret = blockdev.tuned("/dev/sdb", **{"read-only": True})
+        assert ret["comment"] == "Block device /dev/sdb already in correct state"
+        assert dump.call_count == 2
+        tune.assert_called_once()
+
+
+def test_run_batched_errors():
+    """
+    Test that a device failing in the thread pool is left to its own state
+    """
+    dump = MagicMock(side_effect=[CommandExecutionError("boom"), {"getra": "256"}])
+    tune = MagicMock(side_effect=CommandExecutionError("boom"))
+    with patch.dict(
+        blockdev.__salt__,
+        {
+            "file.is_blkdev": MagicMock(return_value=True),
+            "disk.dump": dump,
+            "disk.tune": tune,
+        },
+    ), patch.dict(blockdev.__context__, {}):
+        blockdev._run_batched(
+            {"/dev/sda": {"read-ahead": 512}, "/dev/sdb": {"read-ahead": 512}}
+        )
+        assert blockdev.__context__["blockdev.batched"] == {}
+
+
+def test_mod_aggregate_disabled():
+    """
+    Test that mod_aggregate does nothing unless blockdev_parallel is set
+    """
+    chunks = [{"state": "blockdev", "fun": "tuned", "name": "/dev/sda"}]
+    with patch.dict(blockdev.__opts__, {"test": False}):
+        assert blockdev.mod_aggregate(chunks[0], chunks, {}) == chunks[0]
+    assert "__agg__" not in chunks[0]
+
+
+def test_tuned_test_preview(no_batcher):
+    """
+    Test that test mode previews the changes from the batched lsblk probe
+    without calling disk.dump
+    """
+    name = "/dev/sda"
+    no_batcher.dump.return_value = {"getro": "0", "getra": "256"}
+    dump = MagicMock()
+    with patch.dict(
+        blockdev.__salt__,
+        {"file.is_blkdev": MagicMock(return_value=True), "disk.dump": dump},
+    ), patch.dict(blockdev.__opts__, {"test": True}):
+        ret = blockdev.tuned(name, **{"read-ahead": 512, "read-write": True})
+        assert ret["result"] is None
+        assert ret["changes"] == {"read-ahead": "Changed from 256 to 512"}
+
+        ret = blockdev.tuned(name, **{"read-only": False})
+        assert ret["result"] is True
+        assert ret["comment"] == f"Block device {name} already in correct state"
+
+        # Nothing is probed when lsblk did not run yet
+        no_batcher.probed = False
+        ret = blockdev.tuned(name, **{"read-ahead": 512})
+        assert ret["result"] is None
+        assert ret["changes"] == {}
+    dump.assert_not_called()
+
+
+def test_tuned_dump_failure():
+    """
+    Test that tuned fails cleanly when the current options cannot be read
+    or the device cannot be tuned
+    """
+    name = "/dev/vg/master-data"
+    tune = MagicMock(return_value=False)
+    with patch.dict(
+        blockdev.__salt__,
+        {
+            "file.is_blkdev": MagicMock(return_value=True),
+            "disk.dump": MagicMock(return_value=False),
+            "disk.tune": tune,
+        },
+    ), patch.dict(blockdev.__opts__, {"test": False}):
+        ret = blockdev.tuned(name, **{"read-ahead": 512})
+        assert ret["result"] is False
+        assert (
+            ret["comment"]
+            == f"Failed to read the current options of block device {name}"
+        )
+        tune.assert_not_called()
+
+        blockdev.__salt__["disk.dump"].return_value = {"getra": "256"}
+        ret = blockdev.tuned(name, **{"read-ahead": 512})
+        assert ret["result"] is False
+        assert ret["comment"] == f"Failed to modify block device {name}"
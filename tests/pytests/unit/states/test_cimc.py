@@ -0,0 +1,114 @@
+"""
+Unit tests for the cimc state
+"""
+
+import pytest
+
+import salt.states.cimc as cimc
+from salt.exceptions import CommandExecutionError
+from tests.support.mock import MagicMock
+
+
+def _syslog_conf(primary, secondary):
+    return {
+        "outConfigs": {
+            "commSyslogClient": [
+                {"name": "primary", "adminState": "enabled", "hostname": primary},
+                {"name": "secondary", "adminState": "enabled", "hostname": secondary},
+            ]
+        }
+    }
+
+
+def _pair(name, status="modified"):
+    return {
+        "key": f"sys/svc-ext/syslog/client-{name}",
+        "commSyslogClient": [{"name": name, "status": status}],
+    }
+
+
+@pytest.fixture
+def get_syslog():
+    return MagicMock(return_value=_syslog_conf("10.0.0.1", "10.0.0.2"))
+
+
+@pytest.fixture
+def set_syslog_server():
+    def _set_syslog_server(server, type, batch=None):
+        batch.append((f"sys/svc-ext/syslog/client-{type}", server))
+
+    return MagicMock(side_effect=_set_syslog_server)
+
+
+@pytest.fixture
+def batch():
+    return MagicMock()
+
+
+@pytest.fixture
+def configure_loader_modules(get_syslog, set_syslog_server, batch):
+    return {
+        cimc: {
+            "__salt__": {
+                "cimc.get_syslog": get_syslog,
+                "cimc.set_syslog_server": set_syslog_server,
+                "cimc.batch": batch,
+            }
+        }
+    }
+
+
+def test_syslog_no_changes(set_syslog_server, batch):
+    ret = cimc.syslog("syslog", primary="10.0.0.1", secondary="10.0.0.2")
+    assert ret["result"] is True
+    assert ret["changes"] == {}
+    assert ret["comment"] == "SYSLOG already configured. No changes required."
+    set_syslog_server.assert_not_called()
+    batch.assert_not_called()
+
+
+def test_syslog_primary_changed(get_syslog, batch):
+    after = _syslog_conf("10.0.0.3", "10.0.0.2")
+    get_syslog.side_effect = [get_syslog.return_value, after]
+    batch.return_value = {"outConfigs": {"pair": [_pair("primary")]}}
+
+    ret = cimc.syslog("syslog", primary="10.0.0.3", secondary="10.0.0.2")
+    assert ret["result"] is True
+    assert ret["comment"] == "SYSLOG settings modified."
+    assert ret["changes"]["after"] == after
+    batch.assert_called_once_with(("sys/svc-ext/syslog/client-primary", "10.0.0.3"))
+
+
+def test_syslog_both_changed(batch):
+    batch.return_value = {
+        "outConfigs": {"pair": [_pair("primary"), _pair("secondary")]}
+    }
+
+    ret = cimc.syslog("syslog", primary="10.0.0.3", secondary="10.0.0.4")
+    assert ret["result"] is True
+    assert ret["comment"] == "SYSLOG settings modified."
+    # Both servers are set in a single request
+    batch.assert_called_once_with(
+        ("sys/svc-ext/syslog/client-primary", "10.0.0.3"),
+        ("sys/svc-ext/syslog/client-secondary", "10.0.0.4"),
+    )
+
+
+def test_syslog_not_modified(batch):
+    batch.return_value = {
+        "outConfigs": {"pair": [_pair("primary"), _pair("secondary", "failed")]}
+    }
+
+    ret = cimc.syslog("syslog", primary="10.0.0.3", secondary="10.0.0.4")
+    assert ret["result"] is False
+    assert ret["comment"] == "Error setting secondary SYSLOG server."
+    assert ret["changes"] == {}
+
+
+def test_syslog_error(batch):
+    batch.side_effect = CommandExecutionError("boom")
+
+    ret = cimc.syslog("syslog", primary="10.0.0.3")
+    assert ret["result"] is False
+    assert ret["comment"] == "Error setting SYSLOG servers."
+    assert ret["changes"] == {}
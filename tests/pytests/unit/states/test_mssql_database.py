@@ -0,0 +1,98 @@
+"""
+Unit tests for the mssql_database state
+"""
+
+from collections import OrderedDict
+
+import pytest
+
+import salt.states.mssql_database as mssql_database
+from tests.support.mock import MagicMock, patch
+
+
+@pytest.fixture
+def configure_loader_modules():
+    return {mssql_database: {}}
+
+
+@pytest.mark.parametrize(
+    "options,expected",
+    [
+        ({"RECOVERY": "SIMPLE"}, ["RECOVERY=SIMPLE"]),
+        (OrderedDict([("A", 1), ("B", 2)]), ["A=1", "B=2"]),
+        (["RECOVERY=SIMPLE"], ["RECOVERY=SIMPLE"]),
+        ([{"A": 1}, OrderedDict([("B", 2)])], ["A=1", "B=2"]),
+        ([], []),
+        (None, []),
+        ({}, []),
+        ([1, 2], []),
+        ("RECOVERY=SIMPLE", []),
+    ],
+)
+def test__normalize_options(options, expected):
+    assert mssql_database._normalize_options(options) == expected
+
+
+def test_db_exists_cached():
+    db_exists = MagicMock(return_value=False)
+    db_create = MagicMock(return_value=True)
+    db_remove = MagicMock(return_value=True)
+    with patch.dict(
+        mssql_database.__salt__,
+        {
+            "mssql.db_exists": db_exists,
+            "mssql.db_create": db_create,
+            "mssql.db_remove": db_remove,
+        },
+    ), patch.dict(mssql_database.__opts__, {"test": False}):
+        ret = mssql_database.present("yolo")
+        assert ret["changes"] == {"yolo": "Present"}
+        ret = mssql_database.present("yolo")
+        assert ret["changes"] == {}
+        db_create.assert_called_once()
+
+        ret = mssql_database.absent("yolo")
+        assert ret["changes"] == {"yolo": "Absent"}
+        ret = mssql_database.absent("yolo")
+        assert ret["comment"] == "Database yolo is not present"
+        db_remove.assert_called_once()
+
+        db_exists.assert_called_once_with("yolo")
+
+        # Other connection arguments are not served from the cache
+        mssql_database.absent("yolo", server="other")
+        db_exists.assert_called_with("yolo", server="other")
+
+
+@pytest.mark.parametrize(
+    "removed,result,comment,changes",
+    [
+        (True, True, "Database yolo has been removed", {"yolo": "Absent"}),
+        (None, True, "Database yolo is not present", {}),
+        (False, False, "Database yolo failed to be removed", {}),
+        (
+            "Could not find the database: x",
+            False,
+            "Database yolo failed to be removed",
+            {},
+        ),
+    ],
+)
+def test_absent_if_exists(removed, result, comment, changes):
+    calls = []
+
+    def db_remove(database_name, if_exists=False, **kwargs):
+        calls.append((database_name, if_exists, kwargs))
+        return removed
+
+    db_exists = MagicMock()
+    with patch.dict(
+        mssql_database.__salt__,
+        {"mssql.db_exists": db_exists, "mssql.db_remove": db_remove},
+    ), patch.dict(mssql_database.__opts__, {"test": False}):
+        ret = mssql_database.absent("yolo", server="db")
+    assert ret["result"] is result
+    assert ret["comment"] == comment
+    assert ret["changes"] == changes
+    assert calls == [("yolo", True, {"server": "db"})]
+    db_exists.assert_not_called()
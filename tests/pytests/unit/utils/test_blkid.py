@@ -0,0 +1,54 @@
+"""
+Unit tests for salt.utils.blkid
+"""
+
+import pytest
+
+import salt.utils.blkid
+from tests.support.mock import MagicMock, patch
+
+
+@pytest.fixture
+def libblkid():
+    def lookup_value(probe, name, value, size):
+        value._obj.value = b"ext4"
+        return 0
+
+    lib = MagicMock()
+    lib.blkid_new_probe_from_filename.return_value = 1234
+    lib.blkid_do_safeprobe.return_value = 0
+    lib.blkid_probe_lookup_value.side_effect = lookup_value
+    with patch.object(salt.utils.blkid, "_LIBBLKID", lib):
+        yield lib
+
+
+def test_fstype(libblkid):
+    assert salt.utils.blkid.fstype("/dev/sda1") == "ext4"
+    libblkid.blkid_new_probe_from_filename.assert_called_once_with(b"/dev/sda1")
+    libblkid.blkid_free_probe.assert_called_once_with(1234)
+
+
+def test_fstype_no_filesystem(libblkid):
+    libblkid.blkid_do_safeprobe.return_value = 1
+    assert salt.utils.blkid.fstype("/dev/sda1") == ""
+    libblkid.blkid_free_probe.assert_called_once_with(1234)
+
+
+def test_fstype_probe_error(libblkid):
+    libblkid.blkid_do_safeprobe.return_value = -1
+    assert salt.utils.blkid.fstype("/dev/sda1") is None
+    libblkid.blkid_free_probe.assert_called_once_with(1234)
+
+
+def test_fstype_open_error(libblkid):
+    libblkid.blkid_new_probe_from_filename.return_value = None
+    assert salt.utils.blkid.fstype("/dev/sda1") is None
+    libblkid.blkid_free_probe.assert_not_called()
+
+
+def test_fstype_without_libblkid():
+    with patch.object(salt.utils.blkid, "_LIBBLKID", None), patch(
+        "salt.utils.blkid.CDLL", MagicMock(side_effect=OSError)
+    ):
+        assert salt.utils.blkid.fstype("/dev/sda1") is None
+        assert salt.utils.blkid._LIBBLKID is False
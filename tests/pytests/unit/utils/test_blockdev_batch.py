@@ -0,0 +1,91 @@
+"""
+Unit tests for salt.utils.blockdev_batch
+"""
+
+import pytest
+
+import salt.utils.blockdev_batch
+import salt.utils.json
+from tests.support.mock import MagicMock, patch
+
+LSBLK = {
+    "blockdevices": [
+        {
+            "name": "sda",
+            "fstype": None,
+            "ro": False,
+            "ra": 128,
+            "path": "/dev/sda",
+            "size": 10737418240,
+        },
+        {
+            "name": "sda1",
+            "fstype": "ext4",
+            "ro": "1",
+            "ra": "4096",
+            "path": "/dev/sda1",
+            "size": 10736369664,
+        },
+    ]
+}
+
+
+@pytest.fixture
+def run_all():
+    return MagicMock(
+        return_value={
+            "retcode": 0,
+            "stdout": salt.utils.json.dumps(LSBLK),
+            "stderr": "",
+        }
+    )
+
+
+@pytest.fixture
+def batcher(run_all):
+    with patch("os.path.realpath", lambda path: path):
+        yield salt.utils.blockdev_batch.BlockDevBatcher({}, run_all)
+
+
+def test_probe_once(batcher, run_all):
+    assert not batcher.probed
+    assert batcher.fstype("/dev/sda1") == "ext4"
+    # lsblk reporting no filesystem does not prove there is none
+    assert batcher.fstype("/dev/sda") is None
+    assert batcher.fstype("/dev/sdb") is None
+    assert batcher.probed
+    run_all.assert_called_once_with(
+        salt.utils.blockdev_batch.LSBLK_CMD, python_shell=False, ignore_retcode=True
+    )
+
+
+def test_dump(batcher):
+    assert batcher.dump("/dev/sda") == {"getro": "0", "getra": "256"}
+    assert batcher.dump("/dev/sda1") == {"getro": "1", "getra": "8192"}
+    assert batcher.dump("/dev/sdb") is None
+
+
+def test_invalidate(batcher, run_all):
+    assert batcher.fstype("/dev/sda1") == "ext4"
+    batcher.invalidate("/dev/sda1")
+    assert batcher.fstype("/dev/sda1") is None
+    assert batcher.get("/dev/sda")["name"] == "sda"
+    assert run_all.call_count == 1
+
+    batcher.invalidate()
+    assert batcher.fstype("/dev/sda1") == "ext4"
+    assert run_all.call_count == 2
+
+
+def test_shared_context(run_all):
+    context = {}
+    salt.utils.blockdev_batch.BlockDevBatcher(context, run_all).get("/dev/sda")
+    salt.utils.blockdev_batch.BlockDevBatcher(context, run_all).get("/dev/sda")
+    run_all.assert_called_once()
+
+
+def test_lsblk_failure(batcher, run_all):
+    run_all.return_value = {"retcode": 1, "stdout": "", "stderr": "unknown column"}
+    assert batcher.fstype("/dev/sda1") is None
+    assert batcher.dump("/dev/sda1") is None
+    run_all.assert_called_once()
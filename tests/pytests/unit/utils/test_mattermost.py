@@ -0,0 +1,81 @@
+"""
+Unit tests for salt.utils.mattermost
+"""
+
+import pytest
+
+import salt.utils.mattermost
+from tests.support.mock import MagicMock, patch
+
+
+@pytest.fixture(autouse=True)
+def sessions():
+    with patch.dict(salt.utils.mattermost._SESSIONS, clear=True):
+        yield salt.utils.mattermost._SESSIONS
+
+
+def test_query_reuses_session(sessions):
+    session = MagicMock()
+    session.post.return_value = MagicMock(status_code=200)
+    with patch("requests.Session", MagicMock(return_value=session)) as session_cls:
+        for _ in range(3):
+            ret = salt.utils.mattermost.query(
+                hook="abc", api_url="https://example.com", json={"text": "hi"}
+            )
+            assert ret["res"] is True
+
+    session_cls.assert_called_once_with()
+    assert list(sessions.values()) == [session]
+    assert session.post.call_count == 3
+    session.post.assert_called_with(
+        "https://example.com/hooks/abc",
+        data=None,
+        json={"text": "hi"},
+        timeout=(3, 10),
+    )
+
+
+def test_query_session_per_settings(sessions):
+    proxied = MagicMock()
+    direct = MagicMock()
+    proxied.post.return_value = direct.post.return_value = MagicMock(status_code=200)
+    with patch("requests.Session", MagicMock(side_effect=[proxied, direct])):
+        salt.utils.mattermost.query(
+            hook="abc",
+            api_url="https://example.com",
+            json={"text": "hi"},
+            opts={"proxy_host": "squid", "proxy_port": 3128},
+        )
+        salt.utils.mattermost.query(
+            hook="abc", api_url="https://example.com", json={"text": "hi"}, opts={}
+        )
+
+    # The proxy settings of the first caller do not apply to the second one
+    assert proxied.proxies == {
+        "http": "http://squid:3128",
+        "https": "http://squid:3128",
+    }
+    proxied.post.assert_called_once()
+    direct.post.assert_called_once()
+    assert len(sessions) == 2
+
+
+def test_query_error_response():
+    session = MagicMock()
+    session.post.return_value = MagicMock(
+        status_code=400, json=MagicMock(return_value={"error": "bad request"})
+    )
+    with patch("requests.Session", MagicMock(return_value=session)):
+        ret = salt.utils.mattermost.query(
+            hook="abc", api_url="https://example.com", json={"text": "hi"}
+        )
+    assert ret == {"message": "bad request", "res": False}
+
+
+def test_split_messages():
+    split = salt.utils.mattermost.split_messages
+    assert split([]) == []
+    assert split(["first", "second"]) == ["first\nsecond"]
+    assert split(["aa", "bb", "cc"], size=5) == ["aa\nbb", "cc"]
+    # An oversized message is returned on its own
+    assert split(["aa", "b" * 8, "cc"], size=5) == ["aa", "b" * 8, "cc"]